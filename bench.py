@@ -0,0 +1,704 @@
+import argparse
+import csv
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+from core import (
+    EMIT_FIELD,
+    EMIT_MODES,
+    REQUIRED_FIELDS,
+    ColumnMatcher,
+    NullSink,
+    PacingScheduler,
+    RecordingSink,
+    RowRecord,
+    ShardCoordinator,
+    ShardJournal,
+    SimulatedTargetForm,
+    calibrate_speed,
+    emit_record,
+    invalidate_csv_index,
+    iter_data_records,
+    iter_xlsx_records,
+    load_resume_point,
+    make_projector,
+    map_row,
+    process_file,
+    read_csv_rows,
+    resolve_column_mapping,
+    run_job_queue,
+    run_shard_worker,
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SINKS = {"null": NullSink, "recording": RecordingSink}
+STARTUP_RUNS = 5
+STARTUP_COMMANDS = {
+    "python": ["-c", "pass"],
+    "core": ["-c", "import core"],
+    "cli": ["main.py", "--help"],
+    "gui": ["-c", "import gui"],
+}
+
+
+def synthetic_row(index, invalid_every=50):
+    peso = "" if invalid_every and index % invalid_every == 0 else f"{index % 30},{index % 10}"
+    return [
+        "2024-01-01",
+        f"Cliente {index % 997}",
+        f"AB{index:09d}BR",
+        peso,
+        str(10 + index % 40),
+        str(15 + index % 30),
+        str(20 + index % 50),
+        f"{index % 500},99",
+    ]
+
+
+def write_synthetic_csv(file_path, rows, invalid_every=50):
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(["DATA", "CLIENTE"] + REQUIRED_FIELDS + ["VALOR"])
+        for index in range(rows):
+            writer.writerow(synthetic_row(index, invalid_every))
+
+
+def append_synthetic_csv(file_path, start, rows):
+    with open(file_path, "a", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        for index in range(start, start + rows):
+            writer.writerow(synthetic_row(index, invalid_every=0))
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Vendas" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def write_synthetic_xlsx(file_path, rows, invalid_every=50):
+    shared = ["DATA", "CLIENTE"] + REQUIRED_FIELDS + ["VALOR"] + [f"Cliente {index}" for index in range(997)]
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr(
+            "xl/sharedStrings.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            + "".join(f"<si><t>{escape(text)}</t></si>" for text in shared)
+            + "</sst>",
+        )
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + b'<row r="1">'
+                + "".join(f'<c t="s"><v>{index}</v></c>' for index in range(8)).encode()
+                + b"</row>"
+            )
+            for index in range(rows):
+                peso = "" if invalid_every and index % invalid_every == 0 else f"{index % 30}.{index % 10}"
+                sheet.write(
+                    (
+                        f'<row r="{index + 2}"><c><v>45292</v></c><c t="s"><v>{8 + index % 997}</v></c>'
+                        f'<c t="inlineStr"><is><t>AB{index:09d}BR</t></is></c>'
+                        f"<c><v>{peso}</v></c><c><v>{10 + index % 40}</v></c>"
+                        f"<c><v>{15 + index % 30}</v></c><c><v>{20 + index % 50}</v></c>"
+                        f"<c><v>{index % 500}.99</v></c></row>"
+                    ).encode()
+                )
+            sheet.write(b"</sheetData></worksheet>")
+
+
+XLSX_NUMBER_CELLS = {
+    "12.199999999999999": "12.2",
+    "10": "10",
+    "10.0": "10",
+    "0": "0",
+    "1E-3": "0.001",
+    "0.30000000000000004": "0.3",
+    "123456789012": "123456789012",
+    "-4.5": "-4.5",
+}
+
+
+def check_xlsx_cells():
+    with tempfile.TemporaryDirectory() as workdir:
+        file_path = os.path.join(workdir, "numeros.xlsx")
+        with zipfile.ZipFile(file_path, "w") as archive:
+            for name, content in XLSX_PARTS.items():
+                archive.writestr(name, content)
+            archive.writestr(
+                "xl/worksheets/sheet1.xml",
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                "<sheetData><row r=\"1\">"
+                + "".join(f'<c t="n"><v>{raw}</v></c>' for raw in XLSX_NUMBER_CELLS)
+                + "</row></sheetData></worksheet>",
+            )
+        _start, _end, row = next(iter_xlsx_records(file_path))
+    expected = list(XLSX_NUMBER_CELLS.values())
+    for raw, value, wanted in zip(XLSX_NUMBER_CELLS, row, expected):
+        print(f"{raw:>22} -> {value:<14} {'ok' if value == wanted else 'esperado ' + wanted}")
+    if row != expected:
+        print("FALHOU: números da planilha diferentes do que o Excel mostra")
+        return False
+    print("ok")
+    return True
+
+
+def run_pipeline(file_path, sink_factory, emit_mode=EMIT_FIELD):
+    mapping = {field: position for position, field in enumerate(REQUIRED_FIELDS, start=2)}
+    speed_settings = {
+        "key_interval": 0.0,
+        "field_delay": 0.0,
+        "record_delay": 0.0,
+        "emit_mode": emit_mode,
+        "auto_speed": False,
+    }
+    invalidate_csv_index(file_path)
+    processed = [0]
+
+    def on_progress(done, _total, _invalid, _skipped, _unconfirmed):
+        processed[0] = done
+
+    process_file(
+        file_path,
+        mapping,
+        True,
+        on_progress,
+        threading.Event(),
+        threading.Event(),
+        speed_settings,
+        sink=sink_factory(),
+    )
+    return processed[0]
+
+
+def benchmark(file_path, sink_factory, emit_mode=EMIT_FIELD, measure_memory=True):
+    started = time.perf_counter()
+    rows = run_pipeline(file_path, sink_factory, emit_mode)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        run_pipeline(file_path, sink_factory, emit_mode)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def simulate_pacing(file_path, emit_mode=EMIT_FIELD):
+    mapping = {field: position for position, field in enumerate(REQUIRED_FIELDS, start=2)}
+    speed_settings = {
+        "key_interval": 0.008,
+        "field_delay": 0.04,
+        "record_delay": 0.08,
+        "emit_mode": emit_mode,
+        "auto_speed": True,
+    }
+    form = SimulatedTargetForm(min_key_interval=0.004, min_settle=0.02)
+    started = time.perf_counter()
+    result = process_file(
+        file_path,
+        mapping,
+        True,
+        lambda *_args: None,
+        threading.Event(),
+        threading.Event(),
+        speed_settings,
+        sink=form,
+        probe=form,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"ritmo final {result['rate']:.2f}x, {len(form.submitted)} registros, "
+        f"{result['unconfirmed']} não confirmados, {result['processed'] / elapsed:.1f} linhas/s"
+    )
+    if result["unconfirmed_path"]:
+        with open(result["unconfirmed_path"], encoding="utf-8-sig") as file:
+            saved = sum(1 for _line in file) - 1
+        print(f"{saved} não confirmados salvos em {result['unconfirmed_path']}")
+
+
+def simulate_calibration():
+    form = SimulatedTargetForm(min_key_interval=0.004, min_settle=0.02)
+    started = time.perf_counter()
+    profile = calibrate_speed(form, form, threading.Event(), threading.Event(), on_step=print)
+    elapsed = time.perf_counter() - started
+    print(f"perfil {profile} em {elapsed:.0f}s (limites do formulário: 4 ms por tecla, 20 ms)")
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class StoppingSink(RecordingSink):
+    def __init__(self, stop_event, stop_after):
+        super().__init__()
+        self.stop_event = stop_event
+        self.stop_after = stop_after
+
+    def type_text(self, text, interval):
+        super().type_text(text, interval)
+        if sum(1 for kind, _value in self.events if kind == "type") == self.stop_after:
+            self.stop_event.set()
+
+
+class InterruptingSink(RecordingSink):
+    def __init__(self, interrupt_after):
+        super().__init__()
+        self.interrupt_after = interrupt_after
+
+    def type_text(self, text, interval):
+        super().type_text(text, interval)
+        if sum(1 for kind, _value in self.events if kind == "type") == self.interrupt_after:
+            raise KeyboardInterrupt
+
+
+def typed_records(sink):
+    values = [value for kind, value in sink.events if kind == "type"]
+    fields = len(REQUIRED_FIELDS)
+    return [values[i] for i in range(0, len(values) - fields + 1, fields)]
+
+
+def check_shards(rows=400, shard_count=4):
+    speed_settings = {
+        "key_interval": 0.0,
+        "field_delay": 0.0,
+        "record_delay": 0.0,
+        "emit_mode": EMIT_FIELD,
+        "auto_speed": False,
+    }
+    column_mapping = {field: field for field in REQUIRED_FIELDS}
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        file_path = os.path.join(workdir, "vendas.csv")
+        shared_dir = os.path.join(workdir, "compartilhada")
+        write_synthetic_csv(file_path, rows, invalid_every=0)
+        mapping = resolve_column_mapping(file_path, column_mapping)
+        project = make_projector(mapping)
+
+        coordinator = ShardCoordinator(shared_dir, file_path, True, shard_count, "queda")
+        shard, token = coordinator.acquire()
+        journal = ShardJournal(coordinator, shard, token)
+        journal.begin(mapping, True, speed_settings, shard.start_row, None)
+        crashed = RecordingSink()
+        scheduler = PacingScheduler(threading.Event(), threading.Event(), realtime=False)
+        records = iter_data_records(file_path, True, shard.start_row)
+        for row_number in range(shard.start_row, shard.start_row + 11):
+            end, row = next(records)
+            if row_number == shard.start_row + 10:
+                journal.mark_inflight(row_number)
+            emit_record(crashed, project(row), EMIT_FIELD, (0.0, 0.0, 0.0), scheduler)
+            if row_number < shard.start_row + 10:
+                journal.commit(row_number + 1, end)
+        records.close()
+        journal._heartbeat_stop.set()
+        journal._file.close()
+        stale = time.time() - 120
+        os.utime(coordinator.lease_path(shard), (stale, stale))
+
+        stop_event = threading.Event()
+        stopped = StoppingSink(stop_event, len(REQUIRED_FIELDS) * 7 + 1)
+        run_shard_worker(
+            shared_dir,
+            file_path,
+            shard_count,
+            column_mapping,
+            True,
+            lambda *_args: None,
+            threading.Event(),
+            stop_event,
+            speed_settings,
+            worker="parada",
+            sink_factory=lambda: stopped,
+        )
+
+        interrupted = InterruptingSink(len(REQUIRED_FIELDS) * 5 + 2)
+        try:
+            run_shard_worker(
+                shared_dir,
+                file_path,
+                shard_count,
+                column_mapping,
+                True,
+                lambda *_args: None,
+                threading.Event(),
+                threading.Event(),
+                speed_settings,
+                worker="ctrl-c",
+                sink_factory=lambda: interrupted,
+            )
+        except KeyboardInterrupt:
+            pass
+
+        sinks = {"A": [], "B": []}
+
+        def worker(name):
+            run_shard_worker(
+                shared_dir,
+                file_path,
+                shard_count,
+                column_mapping,
+                True,
+                lambda *_args: None,
+                threading.Event(),
+                threading.Event(),
+                speed_settings,
+                worker=name,
+                sink_factory=lambda: sinks[name].append(RecordingSink()) or sinks[name][-1],
+            )
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in sinks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    typed = typed_records(crashed) + typed_records(stopped) + typed_records(interrupted)
+    for name, worker_sinks in sinks.items():
+        worker_typed = [value for sink in worker_sinks for value in typed_records(sink)]
+        print(f"trabalhador {name}: {len(worker_typed)} registros")
+        typed += worker_typed
+    print(
+        f"queda: {len(typed_records(crashed))} registros, parada: {len(typed_records(stopped))},"
+        f" Ctrl+C: {len(typed_records(interrupted))}"
+    )
+    expected = [f"AB{index:09d}BR" for index in range(rows)]
+    counts = {}
+    for objeto in typed:
+        counts[objeto] = counts.get(objeto, 0) + 1
+    missing = [objeto for objeto in expected if objeto not in counts]
+    repeated = [objeto for objeto, count in counts.items() if count > 1]
+    print(f"{len(typed)} registros digitados, {len(missing)} faltando, {len(repeated)} repetidos")
+    if missing or repeated:
+        print(f"FALHOU: faltando {missing[:5]}, repetidos {repeated[:5]}")
+        return False
+    print("ok")
+    return True
+
+
+def wait_for_rows(processed, rows, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while processed[0] < rows:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def check_follow(rows=40, appended=25):
+    speed_settings = {
+        "key_interval": 0.0,
+        "field_delay": 0.0,
+        "record_delay": 0.0,
+        "emit_mode": EMIT_FIELD,
+        "auto_speed": False,
+    }
+    column_mapping = {field: field for field in REQUIRED_FIELDS}
+    sinks = []
+
+    def follow_run(file_path, resume, processed, stop_event):
+        def on_progress(done, *_args):
+            processed[0] = done
+
+        return run_job_queue(
+            [file_path],
+            column_mapping,
+            True,
+            on_progress,
+            threading.Event(),
+            stop_event,
+            speed_settings,
+            resume=resume,
+            collect_metrics=False,
+            sink_factory=lambda: sinks.append(RecordingSink()) or sinks[-1],
+            follow=True,
+        )
+
+    def run_until(file_path, resume, rows_before, extra):
+        processed = [0]
+        stop_event = threading.Event()
+        outcome = {}
+        thread = threading.Thread(
+            target=lambda: outcome.update(
+                results=follow_run(file_path, resume, processed, stop_event)
+            )
+        )
+        thread.start()
+        ready = wait_for_rows(processed, rows_before)
+        append_synthetic_csv(file_path, rows_before, extra)
+        ready = ready and wait_for_rows(processed, rows_before + extra)
+        stop_event.set()
+        thread.join()
+        return ready, outcome["results"][0]
+
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        file_path = os.path.join(workdir, "vendas.csv")
+        write_synthetic_csv(file_path, rows, invalid_every=0)
+        ready, first = run_until(file_path, None, rows, appended)
+        resume = load_resume_point(file_path)
+        print(
+            f"primeira execução: {first.status}, {first.processed} linhas,"
+            f" retomada: {resume is not None}"
+        )
+        if not ready or first.status == "concluído" or resume is None:
+            print("FALHOU: parada no modo contínuo não deixou o diário para retomar")
+            return False
+        append_synthetic_csv(file_path, rows + appended, appended)
+        ready, second = run_until(file_path, resume, rows + 2 * appended, appended)
+        print(f"retomada: {second.status}, até a linha {second.processed}")
+
+    typed = [value for sink in sinks for value in typed_records(sink)]
+    expected = [f"AB{index:09d}BR" for index in range(rows + 3 * appended)]
+    print(f"{len(typed)} registros digitados de {len(expected)}")
+    if not ready or typed != expected:
+        print("FALHOU: registros faltando ou repetidos ao retomar o modo contínuo")
+        return False
+    print("ok")
+    return True
+
+
+def legacy_row(row, mapping):
+    data = map_row(row, mapping)
+    errors = []
+    if not data.get("OBJETO"):
+        errors.append("Objeto vazio")
+    for field in ["PESO", "ALTURA", "LARGURA", "COMPRIMENTO"]:
+        value = data.get(field, "")
+        try:
+            if value == "":
+                raise ValueError("vazio")
+            float(str(value).replace(",", "."))
+        except Exception:
+            errors.append(f"{field} inválido")
+    return [data[field] for field in REQUIRED_FIELDS], errors
+
+
+def projected_row(project, row):
+    record = RowRecord(project(row))
+    return record.values, record.errors
+
+
+def measure_row_path(file_path):
+    mapping = {field: position for position, field in enumerate(REQUIRED_FIELDS, start=2)}
+    rows = list(read_csv_rows(file_path, True))
+    project = make_projector(mapping)
+    paths = {
+        "dict": lambda row: legacy_row(row, mapping),
+        "projeção": lambda row: projected_row(project, row),
+    }
+    print(f"{'caminho':>10} {'µs/linha':>10} {'blocos/linha':>14} {'KiB alocados':>14}")
+    for name, handle in paths.items():
+        started = time.perf_counter()
+        for row in rows:
+            handle(row)
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [handle(row) for row in rows[:10_000]]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        blocks = sum(stat.count_diff for stat in stats)
+        size = sum(stat.size_diff for stat in stats)
+        del kept
+        print(
+            f"{name:>10} {elapsed / len(rows) * 1_000_000:>10.2f}"
+            f" {blocks / 10_000:>14.1f} {size / 1024:>14.0f}"
+        )
+
+
+def measure_matcher(columns=1500, queries=("pe", "peso", "peso brt", "comprim", "codigo", "xyz")):
+    header = [f"Coluna {index} {['peso', 'altura', 'valor', 'cliente'][index % 4]}" for index in range(columns)]
+    header += ["Peso Bruto (kg)", "Alt.", "Largura cm", "Comprimento", "Código Rastreio"]
+    started = time.perf_counter()
+    matcher = ColumnMatcher(header)
+    print(f"índice de {len(header)} colunas: {(time.perf_counter() - started) * 1000:.1f} ms")
+    for field in REQUIRED_FIELDS:
+        print(f"{field:>14} -> {matcher.best_match(field)}")
+    for query in queries:
+        runs = 100
+        started = time.perf_counter()
+        for _ in range(runs):
+            found = matcher.search(query)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{query!r:>14} {len(found):>6} colunas {elapsed * 1000:>8.3f} ms")
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    workdir = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'inicialização':>14} {'ms':>10}")
+    for name, arguments in STARTUP_COMMANDS.items():
+        elapsed = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, *arguments],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            elapsed.append(time.perf_counter() - started)
+        result = "falhou" if completed.returncode else f"{min(elapsed) * 1000:.0f}"
+        print(f"{name:>14} {result:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de importação sem desktop.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--sink", choices=sorted(SINKS), default="null")
+    parser.add_argument("--emit", choices=EMIT_MODES, default=EMIT_FIELD)
+    parser.add_argument("--no-memory", action="store_true", help="não mede o pico de memória")
+    parser.add_argument(
+        "--xlsx",
+        action="store_true",
+        help="mede a leitura de planilhas .xlsx em vez de CSV",
+    )
+    parser.add_argument(
+        "--xlsx-cells",
+        action="store_true",
+        help="verifica a conversão de células numéricas da planilha",
+    )
+    parser.add_argument(
+        "--pacing",
+        action="store_true",
+        help="testa o ritmo automático contra um formulário simulado",
+    )
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="mede o tempo de inicialização da linha de comando e da janela",
+    )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="testa a calibração de velocidade contra um formulário simulado",
+    )
+    parser.add_argument(
+        "--row-path",
+        action="store_true",
+        help="compara o mapeamento por dicionário com a projeção de colunas",
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="verifica lotes com dois trabalhadores, queda e parada no meio de um registro",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="verifica parada e retomada do modo contínuo com um arquivo que cresce",
+    )
+    parser.add_argument(
+        "--matcher",
+        action="store_true",
+        help="mede a busca de colunas em um cabeçalho largo",
+    )
+    args = parser.parse_args()
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    if args.matcher:
+        measure_matcher()
+        return
+
+    if args.shards:
+        if not check_shards():
+            sys.exit(1)
+        return
+
+    if args.xlsx_cells:
+        if not check_xlsx_cells():
+            sys.exit(1)
+        return
+
+    if args.follow:
+        if not check_follow():
+            sys.exit(1)
+        return
+
+    if args.calibrate:
+        simulate_calibration()
+        return
+
+    if args.row_path:
+        with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+            for size in args.rows:
+                file_path = os.path.join(workdir, f"vendas_{size}.csv")
+                write_synthetic_csv(file_path, size)
+                print(f"{size} linhas")
+                measure_row_path(file_path)
+        return
+
+    if args.startup:
+        measure_startup()
+        return
+
+    if args.pacing:
+        with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+            for size in args.rows:
+                file_path = os.path.join(workdir, f"vendas_{size}.csv")
+                write_synthetic_csv(file_path, size, invalid_every=0)
+                simulate_pacing(file_path, args.emit)
+        return
+
+    print(f"{'linhas':>10} {'segundos':>10} {'linhas/s':>12} {'pico MiB':>10}")
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        for size in args.rows:
+            if args.xlsx:
+                file_path = os.path.join(workdir, f"vendas_{size}.xlsx")
+                write_synthetic_xlsx(file_path, size)
+            else:
+                file_path = os.path.join(workdir, f"vendas_{size}.csv")
+                write_synthetic_csv(file_path, size)
+            rows, elapsed, peak = benchmark(
+                file_path, SINKS[args.sink], args.emit, not args.no_memory
+            )
+            peak_text = "-" if peak is None else f"{peak / (1024 * 1024):.1f}"
+            print(f"{rows:>10} {elapsed:>10.2f} {rows / elapsed:>12.0f} {peak_text:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3012 @@
+import array
+import atexit
+import bisect
+import codecs
+import cProfile
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import logging.handlers
+import operator
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from xml.etree import ElementTree
+
+CONFIG_FILE = "config.json"
+CONFIG_SAVE_DELAY = 0.5
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "app.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+REJECTED_BATCH_ROWS = 500
+REJECTED_RUN_SUFFIX = "_digitacao"
+UNCONFIRMED_SUFFIX = "_nao_confirmadas"
+UNCONFIRMED_ERROR = "Não confirmada pelo destino"
+JOBS_FILE = os.path.join(LOG_DIR, "jobs.jsonl")
+METRICS_JSONL_FILE = os.path.join(LOG_DIR, "metrics.jsonl")
+METRICS_PROM_FILE = os.path.join(LOG_DIR, "metrics.prom")
+METRICS_FLUSH_SECONDS = 10.0
+METRICS_STAGES = ("parse", "map", "validate", "stall", "inject", "settle", "row")
+METRICS_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+SUBMITTED_DB = "submitted.db"
+SUBMITTED_BATCH_SIZE = 20
+JOURNAL_DIR = "journal"
+JOURNAL_SYNC_ROWS = 20
+JOURNAL_SYNC_SECONDS = 2.0
+FINGERPRINT_BYTES = 64 * 1024
+SHARD_HEARTBEAT_SECONDS = 5.0
+SHARD_LEASE_TIMEOUT = 60.0
+SHARD_SETTLE_SECONDS = 2.0
+SAMPLE_SIZE = 4096
+ENCODING_SAMPLE_SIZE = 64 * 1024
+FALLBACK_ENCODING = "cp1252"
+COMPRESSED_SUFFIXES = (".gz", ".zip")
+XLSX_SUFFIXES = (".xlsx", ".xlsm")
+XLSX_SAMPLE_ROWS = 20
+XLSX_BLOCK_ROWS = 1000
+XLSX_CACHED_BLOCKS = 8
+XLSX_BACK_BLOCKS = 3
+INDEX_STRIDE = 1000
+FOLLOW_POLL_SECONDS = 0.5
+VALIDATION_CHUNK_ROWS = 50 * INDEX_STRIDE
+VALIDATION_SAMPLE_LIMIT = 20
+BACKGROUND_VALIDATION_WORKERS = 1
+REQUIRED_FIELDS = ["OBJETO", "PESO", "ALTURA", "LARGURA", "COMPRIMENTO"]
+MEASURE_FIELDS = REQUIRED_FIELDS[1:]
+EMIT_FIELD = "Por campo"
+EMIT_RECORD = "Por registro"
+EMIT_PASTE = "Colar"
+EMIT_MODES = [EMIT_FIELD, EMIT_RECORD, EMIT_PASTE]
+DEFAULT_TEMPLATE_NAME = "Padrão"
+DEFAULT_TEMPLATE = [{"field": field, "key": "enter"} for field in REQUIRED_FIELDS]
+PACING_INCREASE = 0.05
+PACING_DECREASE = 0.5
+PACING_MIN_RATE = 0.25
+PACING_MAX_RATE = 4.0
+PACING_MIN_FIELD_DELAY = 0.01
+SCHEDULER_MIN_SETTLE_RATIO = 0.5
+SCHEDULER_POLL_INTERVAL = 0.01
+PIPELINE_QUEUE_ROWS = 256
+PIPELINE_POLL_INTERVAL = 0.1
+PIPELINE_STALL_SECONDS = 0.001
+PIPELINE_PROFILE_SUFFIX = "_leitura"
+ACK_TIMEOUT = 2.0
+ACK_POLL_INTERVAL = 0.05
+CALIBRATION_TRIALS = 3
+CALIBRATION_STEPS = 6
+CALIBRATION_MARGIN = 1.25
+CALIBRATION_RECORD_RATIO = 2.0
+SPEED_PRESETS = {
+    "Lenta": {"key_interval": 0.08, "field_delay": 0.4, "record_delay": 0.8},
+    "Normal": {"key_interval": 0.04, "field_delay": 0.25, "record_delay": 0.5},
+    "Rápida": {"key_interval": 0.01, "field_delay": 0.1, "record_delay": 0.2},
+}
+FIELD_SYNONYMS = {
+    "OBJETO": ["sro", "codigo objeto", "codigo rastreio", "rastreio", "etiqueta"],
+    "PESO": ["peso bruto", "peso kg", "kg", "massa"],
+    "ALTURA": ["altura cm", "height"],
+    "LARGURA": ["largura cm", "width"],
+    "COMPRIMENTO": ["comprimento cm", "length", "profundidade"],
+}
+MATCH_NGRAM = 3
+MATCH_MIN_SCORE = 0.5
+FIELD_LABELS = {
+    "OBJETO": "Objeto",
+    "PESO": "Peso",
+    "ALTURA": "Altura",
+    "LARGURA": "Largura",
+    "COMPRIMENTO": "Comprimento",
+}
+
+
+@dataclass
+class AppConfig:
+    column_mapping: dict
+    skip_first_line: bool
+    speed_preset: str
+    auto_speed: bool
+    emit_mode: str = EMIT_FIELD
+    record_delay: float = None
+    ack_region: list = None
+    skip_submitted: bool = True
+    profiles: dict = None
+    speed_profiles: dict = None
+    template: str = DEFAULT_TEMPLATE_NAME
+    templates: dict = None
+
+
+_log_listener = None
+
+
+def ensure_logging():
+    global _log_listener
+    if _log_listener is not None:
+        return
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _log_listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    _log_listener = None
+
+
+def load_config():
+    if not os.path.exists(CONFIG_FILE):
+        return AppConfig(
+            column_mapping={},
+            skip_first_line=True,
+            speed_preset="Normal",
+            auto_speed=False,
+        )
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        column_mapping = data.get("column_mapping", {})
+        if "SRO" in column_mapping and "OBJETO" not in column_mapping:
+            column_mapping["OBJETO"] = column_mapping.pop("SRO")
+        return AppConfig(
+            column_mapping=column_mapping,
+            skip_first_line=data.get("skip_first_line", True),
+            speed_preset=data.get("speed_preset", "Normal"),
+            auto_speed=bool(data.get("auto_speed", False)),
+            emit_mode=data.get("emit_mode", EMIT_FIELD),
+            record_delay=data.get("record_delay"),
+            ack_region=data.get("ack_region"),
+            skip_submitted=bool(data.get("skip_submitted", True)),
+            profiles={
+                key: {"column_mapping": profile.get("column_mapping") or {}}
+                for key, profile in (data.get("profiles") or {}).items()
+            },
+            speed_profiles=data.get("speed_profiles") or {},
+            template=data.get("template", DEFAULT_TEMPLATE_NAME),
+            templates=data.get("templates") or {},
+        )
+    except Exception as exc:
+        logging.exception("Falha ao carregar config: %s", exc)
+        return AppConfig(
+            column_mapping={},
+            skip_first_line=True,
+            speed_preset="Normal",
+            auto_speed=False,
+        )
+
+
+def save_config(config: AppConfig):
+    temp_path = f"{CONFIG_FILE}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "column_mapping": config.column_mapping,
+                "skip_first_line": config.skip_first_line,
+                "speed_preset": config.speed_preset,
+                "auto_speed": config.auto_speed,
+                "emit_mode": config.emit_mode,
+                "record_delay": config.record_delay,
+                "ack_region": config.ack_region,
+                "skip_submitted": config.skip_submitted,
+                "profiles": config.profiles or {},
+                "speed_profiles": config.speed_profiles or {},
+                "template": config.template,
+                "templates": config.templates or {},
+            },
+            file,
+            ensure_ascii=False,
+            indent=2,
+        )
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, CONFIG_FILE)
+
+
+class ConfigStore:
+    def __init__(self, config=None, delay=CONFIG_SAVE_DELAY):
+        self.config = config if config is not None else load_config()
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+
+    def update(self, config):
+        with self._lock:
+            if config == self.config and not self._dirty:
+                return
+            self.config = config
+            self._dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            try:
+                save_config(self.config)
+                self._dirty = False
+            except OSError as exc:
+                logging.exception("Falha ao salvar config: %s", exc)
+
+
+def speed_presets(speed_profiles=None):
+    return {**SPEED_PRESETS, **(speed_profiles or {})}
+
+
+def calibrated_profile_name():
+    return f"Calibrada ({socket.gethostname()})"
+
+
+def field_templates(templates=None):
+    return {DEFAULT_TEMPLATE_NAME: DEFAULT_TEMPLATE, **(templates or {})}
+
+
+def build_speed_settings(
+    preset_name,
+    emit_mode=EMIT_FIELD,
+    record_delay=None,
+    auto_speed=False,
+    speed_profiles=None,
+    template_name=DEFAULT_TEMPLATE_NAME,
+    templates=None,
+):
+    presets = speed_presets(speed_profiles)
+    preset = presets.get(preset_name, SPEED_PRESETS["Normal"])
+    return {
+        "key_interval": preset["key_interval"],
+        "field_delay": preset["field_delay"],
+        "record_delay": preset["record_delay"] if record_delay is None else record_delay,
+        "emit_mode": emit_mode,
+        "auto_speed": auto_speed,
+        "template": field_templates(templates).get(template_name, DEFAULT_TEMPLATE),
+    }
+
+
+def detect_delimiter(sample_text):
+    try:
+        dialect = csv.Sniffer().sniff(sample_text, delimiters=";,\t,")
+        return dialect.delimiter
+    except csv.Error:
+        if ";" in sample_text:
+            return ";"
+        return ","
+
+
+@dataclass
+class CsvIndex:
+    file_path: str
+    size: int
+    mtime_ns: int
+    delimiter: str
+    has_header: bool
+    header: list
+    row_count: int
+    offsets: list
+    encoding: str = "utf-8"
+    compressed: bool = False
+
+    def locate(self, row_number):
+        slot = min(row_number // INDEX_STRIDE, len(self.offsets) - 1)
+        if slot < 0:
+            return 0, row_number
+        return self.offsets[slot], row_number - slot * INDEX_STRIDE
+
+
+_index_cache = {}
+_index_lock = threading.Lock()
+_scan_locks = {}
+
+
+def is_xlsx(file_path):
+    return file_path.lower().endswith(XLSX_SUFFIXES)
+
+
+def is_compressed(file_path):
+    return file_path.lower().endswith(COMPRESSED_SUFFIXES + XLSX_SUFFIXES)
+
+
+def is_supported_input(file_path):
+    return file_path.lower().endswith((".csv",) + COMPRESSED_SUFFIXES + XLSX_SUFFIXES)
+
+
+def source_name(file_path):
+    name = os.path.basename(file_path)
+    for suffix in COMPRESSED_SUFFIXES + XLSX_SUFFIXES + (".csv",):
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def _zip_member(archive):
+    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    for name in names:
+        if name.lower().endswith(".csv"):
+            return name
+    if not names:
+        raise ValueError("Arquivo zip vazio")
+    return names[0]
+
+
+@contextmanager
+def open_source(file_path):
+    lowered = file_path.lower()
+    if lowered.endswith(".gz"):
+        with gzip.open(file_path, "rb") as file:
+            yield file
+    elif lowered.endswith(".zip"):
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(_zip_member(archive)) as member:
+                yield io.BufferedReader(member)
+    else:
+        with open(file_path, "rb") as file:
+            yield file
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+class SharedStrings:
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array.array("Q", [0])
+
+    def append(self, text):
+        self._data += text.encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position):
+        start = self._offsets[position]
+        return self._data[start : self._offsets[position + 1]].decode("utf-8")
+
+
+_shared_strings_cache = {}
+_shared_strings_lock = threading.Lock()
+
+
+def _xlsx_sheet_path(archive):
+    names = set(archive.namelist())
+    try:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        relations = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        workbook = relations = None
+    if workbook is not None:
+        first_sheet = next((el for el in workbook.iter() if _local_name(el.tag) == "sheet"), None)
+        relation_id = None
+        if first_sheet is not None:
+            relation_id = next(
+                (value for key, value in first_sheet.attrib.items() if _local_name(key) == "id"),
+                None,
+            )
+        for relation in relations.iter():
+            if relation.get("Id") == relation_id:
+                target = relation.get("Target", "").lstrip("/")
+                path = target if target.startswith("xl/") else f"xl/{target}"
+                if path in names:
+                    return path
+    worksheets = sorted(name for name in names if name.startswith("xl/worksheets/sheet"))
+    if not worksheets:
+        raise ValueError("Planilha sem abas")
+    return worksheets[0]
+
+
+def load_shared_strings(file_path, archive):
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _shared_strings_lock:
+        cached = _shared_strings_cache.get(key)
+    if cached is not None:
+        return cached
+    strings = SharedStrings()
+    if "xl/sharedStrings.xml" in archive.namelist():
+        with archive.open("xl/sharedStrings.xml") as source:
+            table = None
+            for event, element in ElementTree.iterparse(source, events=("start", "end")):
+                name = _local_name(element.tag)
+                if event == "start":
+                    if name == "sst":
+                        table = element
+                elif name == "si":
+                    strings.append(_rich_text(element))
+                    if table is not None:
+                        table.remove(element)
+    with _shared_strings_lock:
+        _shared_strings_cache.clear()
+        _shared_strings_cache[key] = strings
+    return strings
+
+
+def _rich_text(element):
+    parts = []
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            parts.extend(run.text or "" for run in child if _local_name(run.tag) == "t")
+    return "".join(parts)
+
+
+def _column_number(reference):
+    number = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        number = number * 26 + ord(char.upper()) - 64
+    return number - 1
+
+
+def _format_number(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return format(number, ".15g")
+
+
+def _cell_value(cell, kind, strings, namespace):
+    if kind == "inlineStr":
+        inline = cell.find(namespace + "is")
+        return "" if inline is None else _rich_text(inline)
+    value = cell.findtext(namespace + "v")
+    if value is None:
+        return ""
+    if kind == "s":
+        return strings[int(value)]
+    if kind == "b":
+        return "VERDADEIRO" if value == "1" else "FALSO"
+    if kind is None or kind == "n":
+        return _format_number(value)
+    return value
+
+
+def iter_xlsx_records(file_path, start_offset=0, end_offset=None):
+    with zipfile.ZipFile(file_path) as archive:
+        strings = load_shared_strings(file_path, archive)
+        with archive.open(_xlsx_sheet_path(archive)) as source:
+            ordinal = 0
+            sheet_data = None
+            namespace = None
+            for event, element in ElementTree.iterparse(source, events=("start", "end")):
+                tag = element.tag
+                if namespace is None:
+                    namespace = tag[: tag.index("}") + 1] if tag.startswith("{") else ""
+                    data_tag, row_tag, cell_tag = (
+                        namespace + "sheetData",
+                        namespace + "row",
+                        namespace + "c",
+                    )
+                if event == "start":
+                    if tag == data_tag:
+                        sheet_data = element
+                    continue
+                if tag != row_tag:
+                    continue
+                if end_offset is not None and ordinal >= end_offset:
+                    return
+                if ordinal >= start_offset:
+                    row = []
+                    for cell in element.iterfind(cell_tag):
+                        reference = cell.get("r")
+                        if reference:
+                            column = _column_number(reference)
+                            if column > len(row):
+                                row.extend([""] * (column - len(row)))
+                        row.append(_cell_value(cell, cell.get("t"), strings, namespace))
+                    yield ordinal, ordinal + 1, row
+                ordinal += 1
+                if sheet_data is not None:
+                    sheet_data.remove(element)
+                else:
+                    element.clear()
+
+
+class XlsxRowCache:
+    def __init__(self, file_path, block_rows=XLSX_BLOCK_ROWS, max_blocks=XLSX_CACHED_BLOCKS):
+        stat = os.stat(file_path)
+        self.file_path = file_path
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.block_rows = block_rows
+        self.max_blocks = max_blocks
+        self._blocks = {}
+        self._cursor = None
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def _store(self, block_start, rows):
+        self._blocks.pop(block_start, None)
+        self._blocks[block_start] = rows
+        while len(self._blocks) > self.max_blocks:
+            del self._blocks[next(iter(self._blocks))]
+
+    def _block(self, block_start):
+        rows = self._blocks.get(block_start)
+        if rows is not None:
+            self._store(block_start, rows)
+            return rows
+        keep_from = max(block_start - XLSX_BACK_BLOCKS * self.block_rows, 0)
+        if self._cursor is None or self._position > block_start:
+            self.close()
+            self._cursor = iter_xlsx_records(self.file_path, keep_from)
+            self._position = keep_from
+        current_start = None
+        current = []
+        for ordinal, _end, row in self._cursor:
+            self._position = ordinal + 1
+            if ordinal < keep_from:
+                continue
+            start = ordinal // self.block_rows * self.block_rows
+            if start != current_start:
+                if current_start is not None:
+                    self._store(current_start, current)
+                current_start = start
+                current = []
+            current.append(row)
+            if start == block_start and len(current) == self.block_rows:
+                break
+        else:
+            self.close()
+        if current_start is not None:
+            self._store(current_start, current)
+        return self._blocks.get(block_start, [])
+
+    def read(self, start, count):
+        with self._lock:
+            rows = []
+            block_start = start // self.block_rows * self.block_rows
+            while len(rows) < count:
+                block = self._block(block_start)
+                rows.extend(block[max(start - block_start, 0) :])
+                if len(block) < self.block_rows:
+                    break
+                block_start += self.block_rows
+            return rows[:count]
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+
+_xlsx_row_cache = None
+_xlsx_row_cache_lock = threading.Lock()
+
+
+def xlsx_row_cache(file_path):
+    global _xlsx_row_cache
+    stat = os.stat(file_path)
+    with _xlsx_row_cache_lock:
+        cache = _xlsx_row_cache
+        if (
+            cache is None
+            or cache.file_path != os.path.abspath(file_path)
+            or cache.size != stat.st_size
+            or cache.mtime_ns != stat.st_mtime_ns
+        ):
+            if cache is not None:
+                with cache._lock:
+                    cache.close()
+            cache = _xlsx_row_cache = XlsxRowCache(os.path.abspath(file_path))
+        return cache
+
+
+def xlsx_sample_text(file_path, rows=XLSX_SAMPLE_ROWS):
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=";")
+    for _start, _end, row in itertools.islice(iter_xlsx_records(file_path), rows):
+        writer.writerow(row)
+    return output.getvalue()
+
+
+def detect_encoding(sample_bytes):
+    if sample_bytes.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(sample_bytes, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def read_sample(file_path, size=ENCODING_SAMPLE_SIZE):
+    with open_source(file_path) as file:
+        return file.read(size)
+
+
+def decode_sample(sample_bytes, encoding):
+    if sample_bytes.startswith(codecs.BOM_UTF8):
+        sample_bytes = sample_bytes[len(codecs.BOM_UTF8):]
+    text = sample_bytes.decode(encoding, errors="ignore")
+    return text[:SAMPLE_SIZE]
+
+
+def iter_csv_records(file_path, delimiter, start_offset=0, end_offset=None, encoding="utf-8"):
+    if is_xlsx(file_path):
+        yield from iter_xlsx_records(file_path, start_offset or 0, end_offset)
+        return
+    with open_source(file_path) as file:
+        if start_offset:
+            file.seek(start_offset)
+        position = start_offset
+
+        def lines():
+            nonlocal position
+            for raw in file:
+                line_start = position
+                position += len(raw)
+                if line_start == 0 and raw.startswith(codecs.BOM_UTF8):
+                    raw = raw[len(codecs.BOM_UTF8):]
+                yield raw.decode(encoding)
+
+        reader = csv.reader(lines(), delimiter=delimiter)
+        while end_offset is None or position < end_offset:
+            offset = position
+            row = next(reader, None)
+            if row is None:
+                return
+            yield offset, position, row
+
+
+def _index_records(file_path, delimiter, encoding):
+    header = []
+    offsets = []
+    row_count = 0
+    for offset, _end, row in iter_csv_records(file_path, delimiter, encoding=encoding):
+        if row_count % INDEX_STRIDE == 0:
+            offsets.append(offset)
+        if row_count == 0:
+            header = row
+        row_count += 1
+    return header, offsets, row_count
+
+
+def scan_csv(file_path):
+    stat = os.stat(file_path)
+    if is_xlsx(file_path):
+        encoding = "utf-8"
+        sample = xlsx_sample_text(file_path)
+        delimiter = ";"
+    else:
+        sample_bytes = read_sample(file_path)
+        encoding = detect_encoding(sample_bytes)
+        sample = decode_sample(sample_bytes, encoding)
+        delimiter = detect_delimiter(sample)
+    try:
+        has_header = csv.Sniffer().has_header(sample)
+    except csv.Error:
+        has_header = False
+    try:
+        header, offsets, row_count = _index_records(file_path, delimiter, encoding)
+    except UnicodeDecodeError:
+        if encoding == FALLBACK_ENCODING:
+            raise
+        logging.warning(
+            "Arquivo %s tem bytes fora de %s após a amostra; usando %s",
+            file_path,
+            encoding,
+            FALLBACK_ENCODING,
+        )
+        encoding = FALLBACK_ENCODING
+        header, offsets, row_count = _index_records(file_path, delimiter, encoding)
+    logging.info("Arquivo indexado: %s (%s linhas, %s)", file_path, row_count, encoding)
+    return CsvIndex(
+        file_path=file_path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        delimiter=delimiter,
+        has_header=has_header,
+        header=header,
+        row_count=row_count,
+        offsets=offsets,
+        encoding=encoding,
+        compressed=is_compressed(file_path),
+    )
+
+
+def _cached_index(key, stat):
+    with _index_lock:
+        index = _index_cache.get(key)
+    if index is not None and index.size == stat.st_size and index.mtime_ns == stat.st_mtime_ns:
+        return index
+    return None
+
+
+def get_csv_index(file_path):
+    key = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    index = _cached_index(key, stat)
+    if index is not None:
+        return index
+    with _index_lock:
+        scan_lock = _scan_locks.setdefault(key, threading.Lock())
+    with scan_lock:
+        index = _cached_index(key, stat)
+        if index is None:
+            index = scan_csv(file_path)
+            with _index_lock:
+                _index_cache[key] = index
+    return index
+
+
+def invalidate_csv_index(file_path=None):
+    with _index_lock:
+        if file_path is None:
+            _index_cache.clear()
+        else:
+            _index_cache.pop(os.path.abspath(file_path), None)
+
+
+def iter_data_records(file_path, skip_first_line, start_row=0, start_offset=None):
+    index = get_csv_index(file_path)
+    if start_offset is None:
+        start_offset, skip = index.locate(start_row + (1 if skip_first_line else 0))
+    else:
+        skip = 0
+    for _offset, end, row in iter_csv_records(
+        file_path, index.delimiter, start_offset, encoding=index.encoding
+    ):
+        if skip:
+            skip -= 1
+            continue
+        yield end, row
+
+
+def _file_identity(stat):
+    return stat.st_dev, stat.st_ino
+
+
+def follow_data_records(
+    file_path, skip_first_line, should_stop, halt, start_row=0, start_offset=None,
+    poll_interval=FOLLOW_POLL_SECONDS,
+):
+    if is_compressed(file_path):
+        raise ValueError("O modo contínuo só funciona com arquivos CSV sem compactação")
+    index = get_csv_index(file_path)
+    if start_offset is None:
+        start_offset, skip = index.locate(start_row + (1 if skip_first_line else 0))
+    else:
+        skip = 0
+
+    def stopped():
+        return should_stop.is_set() or halt.is_set()
+
+    while not stopped():
+        try:
+            file = open(file_path, "rb")
+        except FileNotFoundError:
+            halt.wait(poll_interval)
+            continue
+        with file:
+            identity = _file_identity(os.fstat(file.fileno()))
+            file.seek(start_offset)
+            position = start_offset
+            replaced = False
+
+            def lines():
+                nonlocal position, replaced
+                pending = b""
+                while True:
+                    chunk = file.readline()
+                    if chunk:
+                        pending += chunk
+                        if not pending.endswith(b"\n"):
+                            continue
+                        line_start = position
+                        position += len(pending)
+                        raw, pending = pending, b""
+                        if line_start == 0 and raw.startswith(codecs.BOM_UTF8):
+                            raw = raw[len(codecs.BOM_UTF8):]
+                        yield raw.decode(index.encoding)
+                        continue
+                    if stopped():
+                        return
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        stat = None
+                    if stat is not None and (
+                        _file_identity(stat) != identity or stat.st_size < position + len(pending)
+                    ):
+                        replaced = True
+                        return
+                    halt.wait(poll_interval)
+
+            for row in csv.reader(lines(), delimiter=index.delimiter):
+                if skip:
+                    skip -= 1
+                    continue
+                yield position, row
+        if replaced:
+            logging.warning("%s foi truncado ou substituído; lendo desde o início", file_path)
+            start_offset = 0
+            skip = 1 if skip_first_line else 0
+
+
+def read_csv_rows(file_path, skip_first_line, start_row=0):
+    for _end, row in iter_data_records(file_path, skip_first_line, start_row):
+        yield row
+
+
+def read_row_window(file_path, skip_first_line, start_row, count):
+    if is_xlsx(file_path):
+        first = start_row + (1 if skip_first_line else 0)
+        return xlsx_row_cache(file_path).read(first, count)
+    return list(itertools.islice(read_csv_rows(file_path, skip_first_line, start_row), count))
+
+
+def count_lines(file_path, skip_first_line):
+    index = get_csv_index(file_path)
+    return max(index.row_count - (1 if skip_first_line else 0), 0)
+
+
+def detect_header(file_path):
+    index = get_csv_index(file_path)
+    return index.has_header, index.delimiter
+
+
+def normalize_text(value):
+    return "".join(ch.lower() for ch in str(value).strip() if ch.isalnum())
+
+
+def match_words(value):
+    words = []
+    current = []
+    for ch in unicodedata.normalize("NFKD", str(value)):
+        if unicodedata.combining(ch):
+            continue
+        if ch.isalnum():
+            current.append(ch.lower())
+        elif current:
+            words.append("".join(current))
+            current = []
+    if current:
+        words.append("".join(current))
+    return tuple(words)
+
+
+def ngrams(text, size=MATCH_NGRAM):
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class ColumnMatcher:
+    def __init__(self, columns, synonyms=None):
+        self.columns = list(columns)
+        self.synonyms = FIELD_SYNONYMS if synonyms is None else synonyms
+        self.words = [match_words(column) for column in self.columns]
+        self.normalized = ["".join(words) for words in self.words]
+        self.exact = {}
+        self.first_words = {}
+        self.grams = {}
+        self.gram_counts = []
+        for position, words in enumerate(self.words):
+            self.exact.setdefault("".join(words), position)
+            if words:
+                self.first_words.setdefault(words[0], []).append(position)
+        for position, text in enumerate(self.normalized):
+            grams = ngrams(text)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(position)
+
+    def _candidates(self, query):
+        if len(query) < MATCH_NGRAM:
+            return range(len(self.columns))
+        counts = {}
+        for gram in ngrams(query):
+            for position in self.grams.get(gram, ()):
+                counts[position] = counts.get(position, 0) + 1
+        return counts
+
+    def rank(self, query, fuzzy=True):
+        query = "".join(match_words(query))
+        if not query:
+            return [(0, 0.0, position) for position in range(len(self.columns))]
+        candidates = self._candidates(query)
+        query_grams = len(ngrams(query))
+        ranked = []
+        for position in candidates:
+            text = self.normalized[position]
+            found = text.find(query)
+            if found == 0:
+                tier = 0 if text == query else 1
+                ranked.append((tier, 0.0, position))
+            elif found > 0:
+                ranked.append((2, float(found), position))
+            elif fuzzy and isinstance(candidates, dict):
+                shared = candidates[position]
+                score = 2 * shared / (query_grams + self.gram_counts[position])
+                if score >= MATCH_MIN_SCORE:
+                    ranked.append((3, -score, position))
+        ranked.sort()
+        return ranked
+
+    def search(self, query, limit=None):
+        ranked = self.rank(query)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.columns[position] for _tier, _score, position in ranked]
+
+    def best_match(self, field):
+        terms = [match_words(term) for term in [field] + self.synonyms.get(field, [])]
+        for words in terms:
+            position = self.exact.get("".join(words))
+            if position is not None:
+                return self.columns[position]
+        for words in terms:
+            if not words:
+                continue
+            for position in self.first_words.get(words[0], ()):
+                if self.words[position][: len(words)] == words:
+                    return self.columns[position]
+        return None
+
+
+def layout_key(header):
+    normalized = "\x1f".join(normalize_text(column) for column in header)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def file_layout_key(file_path):
+    index = get_csv_index(file_path)
+    if not index.has_header:
+        return None
+    return layout_key(index.header)
+
+
+def profile_mapping(profiles, key):
+    profile = (profiles or {}).get(key) if key else None
+    if profile is None:
+        return None
+    return profile.get("column_mapping")
+
+
+def parse_measure(value):
+    try:
+        return float(value.replace(",", "."))
+    except (AttributeError, ValueError):
+        return None
+
+
+class RowRecord:
+    __slots__ = ("values", "measures", "errors")
+
+    def __init__(self, values):
+        self.values = values
+        objeto, peso, altura, largura, comprimento = values
+        errors = () if objeto else ("Objeto vazio",)
+        try:
+            self.measures = (
+                float(peso.replace(",", ".")),
+                float(altura.replace(",", ".")),
+                float(largura.replace(",", ".")),
+                float(comprimento.replace(",", ".")),
+            )
+        except ValueError:
+            self.measures = tuple(parse_measure(value) for value in values[1:])
+            errors += tuple(
+                f"{field} inválido"
+                for field, measure in zip(MEASURE_FIELDS, self.measures)
+                if measure is None
+            )
+        self.errors = errors
+
+    @property
+    def objeto(self):
+        return self.values[0]
+
+
+def make_projector(column_mapping):
+    indexes = tuple(column_mapping.get(field) for field in REQUIRED_FIELDS)
+    if None in indexes:
+        width = None
+    else:
+        width = max(max(indexes), -min(indexes)) + 1
+        getter = operator.itemgetter(*indexes)
+
+    def project(row):
+        if width is not None and len(row) >= width:
+            return getter(row)
+        size = len(row)
+        return tuple(
+            row[index] if index is not None and -size <= index < size else ""
+            for index in indexes
+        )
+
+    return project
+
+
+def validate_row(data):
+    values = []
+    for field in REQUIRED_FIELDS:
+        value = data.get(field)
+        values.append("" if value is None else str(value))
+    return list(RowRecord(tuple(values)).errors)
+
+
+def resolve_column_mapping(file_path, column_mapping):
+    index = get_csv_index(file_path)
+    header = [col.strip() for col in index.header] if index.has_header else []
+    mapping = {}
+    for field, value in column_mapping.items():
+        if value in header:
+            mapping[field] = header.index(value)
+        else:
+            try:
+                mapping[field] = int(value) - 1
+            except (TypeError, ValueError):
+                logging.warning("Coluna %s não encontrada em %s", value, file_path)
+    return mapping
+
+
+def map_row(row, column_mapping):
+    data = {}
+    for field, index in column_mapping.items():
+        try:
+            data[field] = row[index]
+        except Exception:
+            data[field] = ""
+    return data
+
+
+@dataclass
+class ValidationReport:
+    total: int
+    invalid: int
+    error_counts: dict
+    samples: list
+    rejected_path: str
+
+
+def plan_chunks(index, skip_first_line, chunk_rows=VALIDATION_CHUNK_ROWS):
+    if index.compressed:
+        chunk_rows = (index.row_count // INDEX_STRIDE + 1) * INDEX_STRIDE
+    chunk_rows = max(chunk_rows // INDEX_STRIDE, 1) * INDEX_STRIDE
+    header_rows = 1 if skip_first_line else 0
+    chunks = []
+    for start_row in range(0, index.row_count, chunk_rows):
+        end_row = start_row + chunk_rows
+        start_offset = index.offsets[start_row // INDEX_STRIDE]
+        end_offset = None
+        if end_row < index.row_count:
+            end_offset = index.offsets[end_row // INDEX_STRIDE]
+        chunks.append((start_offset, end_offset, start_row - header_rows))
+    return chunks
+
+
+def _validate_chunk(task):
+    file_path, delimiter, encoding, start_offset, end_offset, row_base, column_mapping = task
+    checked = 0
+    error_counts = {}
+    rejected = []
+    row_number = row_base
+    project = make_projector(column_mapping)
+    records = iter_csv_records(file_path, delimiter, start_offset, end_offset, encoding)
+    for _offset, _end, row in records:
+        row_number += 1
+        if row_number <= 0:
+            continue
+        checked += 1
+        errors = RowRecord(project(row)).errors
+        if errors:
+            for error in errors:
+                error_counts[error] = error_counts.get(error, 0) + 1
+            rejected.append((row_number, errors, row))
+    return checked, error_counts, rejected
+
+
+def rejected_rows_path(file_path, suffix=""):
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(LOG_DIR, f"rejected_{source_name(file_path)}_{key}{suffix}.csv")
+
+
+class RejectedRowsWriter:
+    def __init__(self, file_path, index, batch_rows=REJECTED_BATCH_ROWS, append=False, path=None):
+        self.path = path or rejected_rows_path(file_path)
+        self.batch_rows = batch_rows
+        self.count = 0
+        self._pending = []
+        os.makedirs(LOG_DIR, exist_ok=True)
+        append = append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if append:
+            self._file = open(self.path, "a", encoding="utf-8", newline="")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file, delimiter=index.delimiter)
+        if append:
+            return
+        if index.has_header:
+            columns = [col.strip() for col in index.header]
+        else:
+            columns = [str(i) for i in range(1, len(index.header) + 1)]
+        self._writer.writerow(["LINHA", "ERROS"] + columns)
+
+    def add(self, row_number, errors, row):
+        self._pending.append([row_number, "; ".join(errors)] + row)
+        self.count += 1
+        if len(self._pending) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._writer.writerows(self._pending)
+            self._pending = []
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def validate_file(
+    file_path,
+    column_mapping,
+    skip_first_line,
+    workers=None,
+    sample_limit=VALIDATION_SAMPLE_LIMIT,
+    should_stop=None,
+):
+    index = get_csv_index(file_path)
+    chunks = plan_chunks(index, skip_first_line)
+    tasks = [
+        (file_path, index.delimiter, index.encoding, start, end, row_base, column_mapping)
+        for start, end, row_base in chunks
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    writer = RejectedRowsWriter(file_path, index)
+    total = 0
+    error_counts = {}
+    samples = []
+    logging.info("Validando %s em %s bloco(s)", file_path, len(tasks))
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_validate_chunk, tasks)
+    else:
+        executor = None
+        results = map(_validate_chunk, tasks)
+    stopped = False
+    try:
+        for checked, chunk_counts, rejected in results:
+            if should_stop is not None and should_stop.is_set():
+                stopped = True
+                logging.info("Validação de %s interrompida", file_path)
+                break
+            total += checked
+            for error, count in chunk_counts.items():
+                error_counts[error] = error_counts.get(error, 0) + count
+            for row_number, errors, row in rejected:
+                if len(samples) < sample_limit:
+                    samples.append((row_number, errors))
+                writer.add(row_number, errors, row)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=stopped)
+        writer.close()
+    logging.info("Validação concluída: %s linhas, %s inválidas", total, writer.count)
+    return ValidationReport(
+        total=total,
+        invalid=writer.count,
+        error_counts=error_counts,
+        samples=samples,
+        rejected_path=writer.path,
+    )
+
+
+def format_validation_report(report):
+    lines = [
+        f"Linhas verificadas: {report.total}",
+        f"Linhas inválidas: {report.invalid}",
+    ]
+    if report.error_counts:
+        lines.append("")
+        lines.append("Erros por tipo:")
+        for error, count in sorted(report.error_counts.items(), key=lambda item: -item[1]):
+            lines.append(f"  {error}: {count}")
+    if report.samples:
+        lines.append("")
+        lines.append(f"Primeiras {len(report.samples)} linhas inválidas:")
+        for row_number, errors in report.samples:
+            lines.append(f"  Linha {row_number}: {'; '.join(errors)}")
+        lines.append("")
+        lines.append(f"Linhas rejeitadas salvas em: {report.rejected_path}")
+    return "\n".join(lines)
+
+
+def file_fingerprint(file_path, head_bytes=FINGERPRINT_BYTES):
+    stat = os.stat(file_path)
+    with open(file_path, "rb") as file:
+        head = hashlib.sha1(file.read(head_bytes)).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "head": head}
+
+
+def journal_path(file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(JOURNAL_DIR, f"{key}.jsonl")
+
+
+@dataclass
+class ResumePoint:
+    row: int
+    offset: int
+    column_mapping: dict
+    skip_first_line: bool
+    speed_settings: dict
+    end_row: int = None
+    follow: bool = False
+
+
+class ResumeJournal:
+    def __init__(
+        self,
+        file_path,
+        sync_rows=JOURNAL_SYNC_ROWS,
+        sync_seconds=JOURNAL_SYNC_SECONDS,
+        path=None,
+    ):
+        self.file_path = file_path
+        self.path = path or journal_path(file_path)
+        self.sync_rows = sync_rows
+        self.sync_seconds = sync_seconds
+        self._file = None
+        self._pending = 0
+        self._last_sync = 0.0
+
+    def begin(
+        self,
+        column_mapping,
+        skip_first_line,
+        speed_settings,
+        row,
+        offset,
+        resume=False,
+        end_row=None,
+        follow=False,
+    ):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._write(
+            {
+                "event": "start",
+                "file": os.path.abspath(self.file_path),
+                "fingerprint": file_fingerprint(self.file_path),
+                "column_mapping": column_mapping,
+                "skip_first_line": skip_first_line,
+                "speed_settings": speed_settings,
+                "row": row,
+                "offset": offset,
+                "end_row": end_row,
+                "follow": follow,
+            }
+        )
+        self.sync()
+
+    def mark_inflight(self, row):
+        pass
+
+    def abort_inflight(self, row):
+        pass
+
+    def commit(self, row, offset):
+        self._write({"event": "commit", "row": row, "offset": offset})
+        self._pending += 1
+        if (
+            self._pending >= self.sync_rows
+            or time.monotonic() - self._last_sync >= self.sync_seconds
+        ):
+            self.sync()
+
+    def finish(self, completed):
+        if self._file is None:
+            return
+        if completed:
+            self._write({"event": "done"})
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+
+def _journal_matches(file_path, start, last):
+    recorded = start.get("fingerprint") or {}
+    if not start.get("follow"):
+        return recorded == file_fingerprint(file_path)
+    current = file_fingerprint(file_path, min(recorded.get("size", 0), FINGERPRINT_BYTES))
+    return current["head"] == recorded.get("head") and current["size"] >= (last["offset"] or 0)
+
+
+def load_resume_point(file_path):
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return None
+    start = None
+    last = None
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("event") == "start":
+                start = record
+                last = record
+            elif record.get("event") == "commit":
+                last = record
+            elif record.get("event") == "done":
+                start = None
+                last = None
+    if start is None or not _journal_matches(file_path, start, last):
+        return None
+    return ResumePoint(
+        row=last["row"],
+        offset=last["offset"],
+        column_mapping=start["column_mapping"],
+        skip_first_line=start["skip_first_line"],
+        speed_settings=start["speed_settings"],
+        end_row=start.get("end_row"),
+        follow=start.get("follow", False),
+    )
+
+
+class ShardLeaseLost(RuntimeError):
+    pass
+
+
+@dataclass
+class Shard:
+    shard_id: int
+    start_row: int
+    end_row: int
+
+
+def shard_run_dir(shared_dir, file_path):
+    stat = os.stat(file_path)
+    with open_source(file_path) as file:
+        head = hashlib.sha1(file.read(FINGERPRINT_BYTES)).hexdigest()[:12]
+    return os.path.join(shared_dir, f"{source_name(file_path)}_{stat.st_size}_{head}")
+
+
+def plan_shards(total_rows, shard_count):
+    shard_count = max(1, min(shard_count, total_rows or 1))
+    size, extra = divmod(total_rows, shard_count)
+    shards = []
+    start = 0
+    for shard_id in range(shard_count):
+        end = start + size + (1 if shard_id < extra else 0)
+        shards.append(Shard(shard_id=shard_id, start_row=start, end_row=end))
+        start = end
+    return shards
+
+
+def read_shard_progress(path):
+    committed = 0
+    inflight = None
+    done = False
+    if not os.path.exists(path):
+        return committed, inflight, done
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            event = record.get("event")
+            if event == "commit":
+                committed = max(committed, record["row"])
+            elif event == "inflight":
+                inflight = record["row"] if inflight is None else max(inflight, record["row"])
+            elif event == "aborted" and record["row"] == inflight:
+                inflight = None
+            elif event == "done":
+                done = True
+    return committed, inflight, done
+
+
+class ShardCoordinator:
+    def __init__(self, shared_dir, file_path, skip_first_line, shard_count, worker=None):
+        self.file_path = file_path
+        self.run_dir = shard_run_dir(shared_dir, file_path)
+        self.worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.shards = self._load_plan(skip_first_line, shard_count)
+
+    def _load_plan(self, skip_first_line, shard_count):
+        plan_path = os.path.join(self.run_dir, "plan.json")
+        if not os.path.exists(plan_path):
+            total = count_lines(self.file_path, skip_first_line)
+            plan = {
+                "file": os.path.basename(self.file_path),
+                "skip_first_line": skip_first_line,
+                "total": total,
+                "shards": [vars(shard) for shard in plan_shards(total, shard_count)],
+            }
+            temp_path = os.path.join(self.run_dir, f"plan.{uuid.uuid4().hex}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(plan, file, ensure_ascii=False, indent=2)
+            try:
+                os.link(temp_path, plan_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(temp_path)
+        with open(plan_path, "r", encoding="utf-8") as file:
+            plan = json.load(file)
+        if plan["skip_first_line"] != skip_first_line:
+            raise ValueError("O plano de lotes usa outra configuração de primeira linha")
+        return [Shard(**shard) for shard in plan["shards"]]
+
+    def lease_path(self, shard):
+        return os.path.join(self.run_dir, f"shard_{shard.shard_id}.lease")
+
+    def progress_path(self, shard):
+        return os.path.join(self.run_dir, f"shard_{shard.shard_id}.jsonl")
+
+    def shared_now(self):
+        clock_path = os.path.join(self.run_dir, f"clock.{self.worker}")
+        with open(clock_path, "w", encoding="utf-8"):
+            pass
+        return os.stat(clock_path).st_mtime
+
+    def _read_lease(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _create_lease(self, shard):
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(self.lease_path(shard), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump({"worker": self.worker, "token": token}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        return token
+
+    def _break_stale_lease(self, shard):
+        path = self.lease_path(shard)
+        try:
+            age = self.shared_now() - os.stat(path).st_mtime
+        except FileNotFoundError:
+            return True
+        if age < SHARD_LEASE_TIMEOUT:
+            return False
+        lease = self._read_lease(path) or {}
+        try:
+            os.replace(path, f"{path}.{uuid.uuid4().hex}.stale")
+        except FileNotFoundError:
+            return False
+        logging.warning(
+            "Lote %s reatribuído (trabalhador %s sem sinal há %.0fs)",
+            shard.shard_id,
+            lease.get("worker", "?"),
+            age,
+        )
+        return True
+
+    def acquire(self):
+        for shard in self.shards:
+            if read_shard_progress(self.progress_path(shard))[2]:
+                continue
+            token = self._create_lease(shard)
+            if token is None and self._break_stale_lease(shard):
+                token = self._create_lease(shard)
+            if token is not None:
+                logging.info("Lote %s assumido por %s", shard.shard_id, self.worker)
+                return shard, token
+        return None
+
+    def holds(self, shard, token):
+        lease = self._read_lease(self.lease_path(shard))
+        return lease is not None and lease.get("token") == token
+
+    def heartbeat(self, shard, token):
+        if not self.holds(shard, token):
+            return False
+        os.utime(self.lease_path(shard))
+        return True
+
+    def release(self, shard, token):
+        if self.holds(shard, token):
+            os.remove(self.lease_path(shard))
+
+    def resume_row(self, shard):
+        committed, inflight, _done = read_shard_progress(self.progress_path(shard))
+        row = max(shard.start_row, committed)
+        if inflight is not None and inflight >= row:
+            logging.warning(
+                "Linha %s do lote %s pode ter sido digitada antes da falha; pulando para não repetir",
+                inflight + 1,
+                shard.shard_id,
+            )
+            row = inflight + 1
+        return min(row, shard.end_row)
+
+    def status(self):
+        rows = []
+        for shard in self.shards:
+            committed, _inflight, done = read_shard_progress(self.progress_path(shard))
+            lease = self._read_lease(self.lease_path(shard))
+            if done:
+                state = "concluído"
+            elif lease is not None:
+                state = f"em andamento ({lease.get('worker', '?')})"
+            else:
+                state = "livre"
+            done_rows = max(committed - shard.start_row, 0)
+            rows.append((shard, min(done_rows, shard.end_row - shard.start_row), state))
+        return rows
+
+
+class ShardJournal(ResumeJournal):
+    def __init__(self, coordinator, shard, token):
+        super().__init__(coordinator.file_path, path=coordinator.progress_path(shard))
+        self.coordinator = coordinator
+        self.shard = shard
+        self.token = token
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def begin(
+        self,
+        column_mapping,
+        skip_first_line,
+        speed_settings,
+        row,
+        offset,
+        resume=False,
+        end_row=None,
+        follow=False,
+    ):
+        super().begin(
+            column_mapping,
+            skip_first_line,
+            speed_settings,
+            row,
+            offset,
+            resume=True,
+            end_row=end_row,
+            follow=follow,
+        )
+        self._heartbeat_thread = threading.Thread(target=self._beat, daemon=True)
+        self._heartbeat_thread.start()
+
+    def _beat(self):
+        while not self._heartbeat_stop.wait(SHARD_HEARTBEAT_SECONDS):
+            try:
+                if not self.coordinator.heartbeat(self.shard, self.token):
+                    return
+            except OSError as exc:
+                logging.warning("Falha ao renovar lote %s: %s", self.shard.shard_id, exc)
+
+    def mark_inflight(self, row):
+        if not self.coordinator.holds(self.shard, self.token):
+            raise ShardLeaseLost(f"Lote {self.shard.shard_id} foi reatribuído a outro trabalhador")
+        self._write({"event": "inflight", "row": row})
+        self.sync()
+
+    def abort_inflight(self, row):
+        self._write({"event": "aborted", "row": row})
+        self.sync()
+
+    def finish(self, completed):
+        self._heartbeat_stop.set()
+        try:
+            super().finish(completed)
+        finally:
+            self.coordinator.release(self.shard, self.token)
+
+
+def normalize_objeto(value):
+    return str(value).strip().upper()
+
+
+class SubmittedIndex:
+    def __init__(self, path=SUBMITTED_DB, batch_size=SUBMITTED_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS submitted ("
+            "objeto TEXT PRIMARY KEY, submitted_at INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.connection.commit()
+        self._pending = {}
+
+    def __contains__(self, objeto):
+        code = normalize_objeto(objeto)
+        if code in self._pending:
+            return True
+        cursor = self.connection.execute(
+            "SELECT 1 FROM submitted WHERE objeto = ?", (code,)
+        )
+        return cursor.fetchone() is not None
+
+    def add(self, objeto):
+        self._pending[normalize_objeto(objeto)] = int(time.time())
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO submitted (objeto, submitted_at) VALUES (?, ?)",
+            self._pending.items(),
+        )
+        self.connection.commit()
+        self._pending = {}
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+def load_pyautogui():
+    try:
+        import pyautogui
+    except Exception:  # pragma: no cover - optional dependency
+        return None
+    return pyautogui
+
+
+def keyboard_keys():
+    pyautogui = load_pyautogui()
+    if pyautogui is None:
+        return None
+    return frozenset(pyautogui.KEYBOARD_KEYS)
+
+
+def load_pyperclip():
+    try:
+        import pyperclip
+    except Exception:  # pragma: no cover - optional dependency
+        return None
+    return pyperclip
+
+
+class OutputSink:
+    realtime = True
+
+    def type_text(self, text, interval):
+        raise NotImplementedError
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def type_keys(self, keys, interval):
+        for key in keys:
+            if len(key) == 1:
+                self.type_text(key, interval)
+            else:
+                self.press(key)
+
+    def paste(self, text):
+        self.type_text(text, 0)
+
+    def key_names(self):
+        return keyboard_keys()
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiSink(OutputSink):
+    def __init__(self):
+        self.pyautogui = load_pyautogui()
+        if self.pyautogui is None:
+            logging.error("pyautogui não instalado, não é possível digitar")
+            raise RuntimeError("pyautogui não instalado")
+        self.pyperclip = None
+
+    def key_names(self):
+        return frozenset(self.pyautogui.KEYBOARD_KEYS)
+
+    def type_text(self, text, interval):
+        self.pyautogui.typewrite(text, interval=interval)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def type_keys(self, keys, interval):
+        self.pyautogui.typewrite(keys, interval=interval)
+
+    def paste(self, text):
+        if self.pyperclip is None:
+            self.pyperclip = load_pyperclip()
+            if self.pyperclip is None:
+                raise RuntimeError("pyperclip não instalado, não é possível colar")
+        self.pyperclip.copy(text)
+        self.pyautogui.hotkey("ctrl", "v")
+
+
+class RecordingSink(OutputSink):
+    realtime = False
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.events = []
+
+    def _record(self, kind, value):
+        if self.stream is None:
+            self.events.append((kind, value))
+        else:
+            self.stream.write(json.dumps([kind, value], ensure_ascii=False) + "\n")
+
+    def type_text(self, text, interval):
+        self._record("type", text)
+
+    def press(self, key):
+        self._record("press", key)
+
+    def type_keys(self, keys, interval):
+        self._record("keys", keys)
+
+    def paste(self, text):
+        self._record("paste", text)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class NullSink(OutputSink):
+    realtime = False
+
+    def type_text(self, text, interval):
+        pass
+
+    def press(self, key):
+        pass
+
+    def type_keys(self, keys, interval):
+        pass
+
+    def paste(self, text):
+        pass
+
+
+class AckProbe:
+    def reset(self):
+        pass
+
+    def prepare(self):
+        pass
+
+    def confirm(self, values):
+        return True
+
+
+class ScreenRegionProbe(AckProbe):
+    def __init__(self, region, timeout=ACK_TIMEOUT, poll_interval=ACK_POLL_INTERVAL):
+        self.pyautogui = load_pyautogui()
+        if self.pyautogui is None:
+            raise RuntimeError("pyautogui não instalado")
+        self.region = tuple(int(value) for value in region)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._baseline = None
+
+    def _capture(self):
+        return self.pyautogui.screenshot(region=self.region).tobytes()
+
+    def prepare(self):
+        self._baseline = self._capture()
+
+    def confirm(self, values):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if self._capture() != self._baseline:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+
+class SimulatedTargetForm(OutputSink, AckProbe):
+    def __init__(self, fields=len(REQUIRED_FIELDS), min_key_interval=0.004, min_settle=0.02):
+        self.fields = fields
+        self.min_key_interval = min_key_interval
+        self.min_settle = min_settle
+        self.submitted = []
+        self._current = [""]
+        self._ready_at = 0.0
+        self._keys = 0
+
+    def _settled(self):
+        return time.monotonic() >= self._ready_at
+
+    def type_text(self, text, interval):
+        for char in text:
+            if interval > 0:
+                time.sleep(interval)
+            self._keys += 1
+            if not self._settled():
+                continue
+            if interval < self.min_key_interval and self._keys % 2:
+                continue
+            self._current[-1] += char
+
+    def paste(self, text):
+        if self._settled():
+            self._current[-1] += text
+
+    def press(self, key):
+        if key != "enter":
+            return
+        self._ready_at = time.monotonic() + self.min_settle
+        if len(self._current) < self.fields:
+            self._current.append("")
+            return
+        self.submitted.append(self._current)
+        self._current = [""]
+
+    def reset(self):
+        self._current = [""]
+
+    def confirm(self, values):
+        return bool(self.submitted) and self.submitted[-1] == [str(value) for value in values]
+
+
+class PacingController:
+    def __init__(
+        self,
+        speed_settings,
+        increase=PACING_INCREASE,
+        decrease=PACING_DECREASE,
+        min_rate=PACING_MIN_RATE,
+        max_rate=PACING_MAX_RATE,
+        min_field_delay=PACING_MIN_FIELD_DELAY,
+    ):
+        self.key_interval = speed_settings["key_interval"]
+        self.field_delay = speed_settings["field_delay"]
+        self.record_delay = speed_settings.get("record_delay", 0.0)
+        self.increase = increase
+        self.decrease = decrease
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_field_delay = min_field_delay
+        self.rate = 1.0
+        self.confirmed = 0
+        self.unconfirmed = 0
+
+    def timings(self):
+        return (
+            self.key_interval / self.rate,
+            max(self.field_delay / self.rate, self.min_field_delay),
+            max(self.record_delay / self.rate, self.min_field_delay),
+        )
+
+    def record_result(self, confirmed):
+        if confirmed:
+            self.confirmed += 1
+            self.rate = min(self.rate + self.increase, self.max_rate)
+        else:
+            self.unconfirmed += 1
+            self.rate = max(self.rate * self.decrease, self.min_rate)
+
+
+class ControlEvent(threading.Event):
+    def __init__(self, condition):
+        super().__init__()
+        self.condition = condition
+
+    def set(self):
+        super().set()
+        with self.condition:
+            self.condition.notify_all()
+
+    def clear(self):
+        super().clear()
+        with self.condition:
+            self.condition.notify_all()
+
+
+class PacingScheduler:
+    def __init__(
+        self,
+        should_stop,
+        should_pause,
+        realtime=True,
+        min_settle_ratio=SCHEDULER_MIN_SETTLE_RATIO,
+        clock=time.monotonic,
+    ):
+        self.should_stop = should_stop
+        self.should_pause = should_pause
+        self.realtime = realtime
+        self.min_settle_ratio = min_settle_ratio
+        self.clock = clock
+        self.condition = getattr(should_stop, "condition", None)
+        self.waits = 0
+        self.waited = 0.0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self._deadline = clock()
+
+    def mark(self):
+        self._deadline = self.clock()
+
+    def wait(self, delay, budget=0.0):
+        now = self.clock()
+        target = max(self._deadline + budget + delay, now + delay * self.min_settle_ratio)
+        self._deadline = target
+        if not self.realtime:
+            return not self.should_stop.is_set()
+        stopped = not self._wait_until(target)
+        finished = self.clock()
+        self.waited += finished - now
+        if stopped:
+            return False
+        lateness = max(finished - self._deadline, 0.0)
+        self.waits += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        return True
+
+    def checkpoint(self):
+        if self.should_pause.is_set() and not self.should_stop.is_set():
+            self._hold_while_paused()
+            self.mark()
+        return not self.should_stop.is_set()
+
+    def accuracy(self):
+        return {
+            "waits": self.waits,
+            "mean_lateness": self.total_lateness / self.waits if self.waits else 0.0,
+            "max_lateness": self.max_lateness,
+        }
+
+    def _wait_until(self, target):
+        while True:
+            if self.should_stop.is_set():
+                return False
+            if self.should_pause.is_set():
+                paused = self._hold_while_paused()
+                target += paused
+                self._deadline += paused
+                continue
+            remaining = target - self.clock()
+            if remaining <= 0:
+                return True
+            self._block(remaining, lambda: self.should_stop.is_set() or self.should_pause.is_set())
+
+    def _hold_while_paused(self):
+        started = self.clock()
+        while self.should_pause.is_set() and not self.should_stop.is_set():
+            self._block(None, lambda: self.should_stop.is_set() or not self.should_pause.is_set())
+        return self.clock() - started
+
+    def _block(self, timeout, predicate):
+        if self.condition is not None:
+            with self.condition:
+                self.condition.wait_for(predicate, timeout)
+            return
+        if timeout is None or timeout > SCHEDULER_POLL_INTERVAL:
+            timeout = SCHEDULER_POLL_INTERVAL
+        self.should_stop.wait(timeout)
+
+
+def compile_template(template, key_names=None):
+    plan = []
+    for position, step in enumerate(template, start=1):
+        if not isinstance(step, dict):
+            raise ValueError(f"Passo {position} do modelo inválido: {step!r}")
+        field = step.get("field")
+        index = None
+        if field is not None:
+            field = str(field).strip().upper()
+            if field not in REQUIRED_FIELDS:
+                raise ValueError(f"Campo desconhecido no passo {position} do modelo: {field}")
+            index = REQUIRED_FIELDS.index(field)
+        keys = []
+        separator = step.get("key", "enter" if index is not None else None)
+        if separator:
+            keys.append(str(separator))
+        extra = step.get("keys") or []
+        if isinstance(extra, str):
+            extra = [extra]
+        keys.extend(str(key) for key in extra if key)
+        if key_names is not None:
+            for key in keys:
+                if (key.lower() if len(key) > 1 else key) not in key_names:
+                    raise ValueError(f"Tecla desconhecida no passo {position} do modelo: {key}")
+        settle = step.get("settle")
+        if settle is not None:
+            settle = float(settle)
+            if settle < 0:
+                raise ValueError(f"Espera negativa no passo {position} do modelo")
+        if index is None and not keys:
+            raise ValueError(f"Passo {position} do modelo não digita nada")
+        plan.append((index, tuple(keys), settle))
+    if all(index is None for index, _keys, _settle in plan):
+        raise ValueError("O modelo não digita nenhum campo")
+    return tuple(plan)
+
+
+DEFAULT_PLAN = compile_template(DEFAULT_TEMPLATE)
+
+
+def emit_record(sink, values, emit_mode, timings, scheduler, plan=DEFAULT_PLAN):
+    key_interval, field_delay, record_delay = timings
+    scheduler.mark()
+    wait = scheduler.wait
+    final = plan[-1]
+    if emit_mode == EMIT_RECORD:
+        keys = []
+        for step in plan:
+            index, step_keys, settle = step
+            if index is not None:
+                keys.extend(values[index])
+            keys.extend(step_keys)
+            if settle is not None:
+                sink.type_keys(keys, key_interval)
+                if not wait(settle, len(keys) * key_interval):
+                    return step is final
+                keys = []
+        if keys:
+            sink.type_keys(keys, key_interval)
+            wait(record_delay, len(keys) * key_interval)
+        return True
+    press = sink.press
+    if emit_mode == EMIT_PASTE:
+        paste = sink.paste
+        for step in plan:
+            index, keys, settle = step
+            if index is not None:
+                paste(values[index])
+            for key in keys:
+                press(key)
+            if not wait(key_interval if settle is None else settle):
+                return step is final
+        wait(record_delay)
+        return True
+    type_text = sink.type_text
+    for step in plan:
+        index, keys, settle = step
+        typed = len(keys)
+        if index is not None:
+            value = values[index]
+            type_text(value, key_interval)
+            typed += len(value)
+        for key in keys:
+            press(key)
+        if not wait(field_delay if settle is None else settle, typed * key_interval):
+            return step is final
+    return True
+
+
+def calibration_payload(trial):
+    return [
+        f"CAL{trial:05d}BR",
+        f"{trial % 90 + 10},{trial % 10}",
+        str(trial % 70 + 20),
+        str(trial % 50 + 30),
+        str(trial % 80 + 15),
+    ]
+
+
+def calibrate_speed(
+    sink,
+    probe,
+    should_pause,
+    should_stop,
+    on_step=None,
+    trials=CALIBRATION_TRIALS,
+    steps=CALIBRATION_STEPS,
+    margin=CALIBRATION_MARGIN,
+):
+    slowest = SPEED_PRESETS["Lenta"]
+    counter = [0]
+
+    def works(key_interval, field_delay):
+        probe.reset()
+        for _ in range(trials):
+            counter[0] += 1
+            payload = calibration_payload(counter[0])
+            probe.prepare()
+            scheduler = PacingScheduler(should_stop, should_pause, realtime=sink.realtime)
+            timings = (key_interval, field_delay, 0.0)
+            if not emit_record(sink, payload, EMIT_FIELD, timings, scheduler) or should_stop.is_set():
+                return None
+            if not probe.confirm(payload):
+                return False
+        return True
+
+    def search(low, high, check, label):
+        for step in range(steps):
+            middle = (low + high) / 2
+            result = check(middle)
+            if result is None:
+                return None
+            if on_step is not None:
+                on_step(f"{label}: {middle * 1000:.0f} ms {'ok' if result else 'falhou'}")
+            if result:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    baseline = works(slowest["key_interval"], slowest["field_delay"])
+    if not baseline:
+        if baseline is False:
+            logging.warning("Calibração falhou mesmo na velocidade mais lenta")
+        return None
+    key_interval = search(
+        0.0,
+        slowest["key_interval"],
+        lambda value: works(value, slowest["field_delay"]),
+        "Intervalo entre teclas",
+    )
+    if key_interval is None:
+        return None
+    field_delay = search(
+        0.0,
+        slowest["field_delay"],
+        lambda value: works(key_interval, value),
+        "Pausa entre campos",
+    )
+    if field_delay is None:
+        return None
+    field_delay = round(field_delay * margin, 3)
+    profile = {
+        "key_interval": round(key_interval * margin, 4),
+        "field_delay": field_delay,
+        "record_delay": round(field_delay * CALIBRATION_RECORD_RATIO, 3),
+        "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    logging.info("Calibração concluída: %s", profile)
+    return profile
+
+
+class StageHistogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(METRICS_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class RunMetrics:
+    def __init__(
+        self,
+        file_path,
+        jsonl_path=METRICS_JSONL_FILE,
+        prom_path=METRICS_PROM_FILE,
+        flush_seconds=METRICS_FLUSH_SECONDS,
+    ):
+        self.file_path = file_path
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.flush_seconds = flush_seconds
+        self.histograms = {stage: StageHistogram() for stage in METRICS_STAGES}
+        self.counters = {}
+        self._last_flush = time.monotonic()
+
+    def observe(self, stage, seconds):
+        self.histograms[stage].observe(seconds)
+
+    def maybe_flush(self, counters):
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush(counters)
+
+    def flush(self, counters=None):
+        if counters is not None:
+            self.counters = dict(counters)
+        self._last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+        snapshot = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "file": self.file_path,
+            "counters": self.counters,
+            "stages": {
+                stage: {
+                    "count": histogram.count,
+                    "sum": histogram.total,
+                    "buckets": histogram.counts,
+                }
+                for stage, histogram in self.histograms.items()
+            },
+        }
+        with open(self.jsonl_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+        temp_path = self.prom_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(self.render_prometheus())
+        os.replace(temp_path, self.prom_path)
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP importador_stage_seconds Tempo gasto por etapa de cada linha.",
+            "# TYPE importador_stage_seconds histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'importador_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'importador_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'importador_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'importador_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines.append("# HELP importador_rows_total Linhas por situação na execução atual.")
+        lines.append("# TYPE importador_rows_total gauge")
+        for status, value in self.counters.items():
+            lines.append(f'importador_rows_total{{status="{status}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class PipelineStats:
+    def __init__(self, capacity=PIPELINE_QUEUE_ROWS):
+        self._lock = threading.Lock()
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._depth = 0
+            self._stalls = 0
+            self._stall_seconds = 0.0
+
+    def update(self, depth, stall_seconds):
+        with self._lock:
+            self._depth = depth
+            if stall_seconds >= PIPELINE_STALL_SECONDS:
+                self._stalls += 1
+                self._stall_seconds += stall_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return self._depth, self.capacity, self._stalls, self._stall_seconds
+
+
+class RowPipeline:
+    def __init__(
+        self,
+        records,
+        project,
+        first_row,
+        end_row,
+        size=PIPELINE_QUEUE_ROWS,
+        halt=None,
+        profile_path=None,
+    ):
+        self.records = records
+        self.project = project
+        self.first_row = first_row
+        self.end_row = end_row
+        self.profile_path = profile_path
+        self.finished = False
+        self._queue = queue.Queue(maxsize=size)
+        self._halt = halt if halt is not None else threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._halt.is_set():
+            try:
+                self._queue.put(item, timeout=PIPELINE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        clock = time.perf_counter
+        row_number = self.first_row
+        profiler = None
+        if self.profile_path is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            while self.end_row is None or row_number < self.end_row:
+                started = clock()
+                entry = next(self.records, None)
+                if entry is None:
+                    break
+                parsed = clock()
+                end_offset, row = entry
+                values = self.project(row)
+                mapped = clock()
+                record = RowRecord(values)
+                validated = clock()
+                timing = (parsed - started, mapped - parsed, validated - mapped)
+                if not self._put((end_offset, record, timing, row)):
+                    return
+                row_number += 1
+            self._put(None)
+        except Exception as exc:
+            logging.exception("Erro ao ler %s", exc)
+            self._put(exc)
+        finally:
+            self.records.close()
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.profile_path)
+
+    def get(self, should_stop):
+        while True:
+            try:
+                item = self._queue.get(timeout=PIPELINE_POLL_INTERVAL)
+            except queue.Empty:
+                if should_stop.is_set():
+                    return None
+                continue
+            if item is None:
+                self.finished = True
+            elif isinstance(item, Exception):
+                raise item
+            return item
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._halt.set()
+        self._thread.join()
+
+
+def process_file(
+    file_path,
+    column_mapping,
+    skip_first_line,
+    on_progress,
+    should_pause,
+    should_stop,
+    speed_settings,
+    sink=None,
+    journal=None,
+    resume=None,
+    probe=None,
+    submitted=None,
+    metrics=None,
+    profile_path=None,
+    start_row=0,
+    end_row=None,
+    pipeline_stats=None,
+    follow=False,
+):
+    if sink is None:
+        sink = PyAutoGuiSink()
+    emit_mode = speed_settings.get("emit_mode", EMIT_FIELD)
+    pacing = None
+    if speed_settings["auto_speed"]:
+        if probe is None:
+            logging.warning("Modo automático sem sonda de confirmação; usando velocidade fixa")
+        else:
+            pacing = PacingController(speed_settings)
+    timings = (
+        speed_settings["key_interval"],
+        speed_settings["field_delay"],
+        speed_settings.get("record_delay", 0.0),
+    )
+    scheduler = PacingScheduler(should_stop, should_pause, realtime=sink.realtime)
+    plan = compile_template(speed_settings.get("template") or DEFAULT_TEMPLATE, sink.key_names())
+    project = make_projector(column_mapping)
+    total = count_lines(file_path, skip_first_line)
+    if end_row is not None:
+        total = min(total, end_row)
+    processed = start_row
+    invalid = 0
+    unconfirmed = 0
+    skipped = 0
+    start_offset = None
+    if resume is not None:
+        processed = resume.row
+        start_offset = resume.offset
+        logging.info("Retomando %s a partir da linha %s", file_path, processed + 1)
+    else:
+        logging.info("Iniciando automação para %s", file_path)
+    if journal is not None:
+        journal.begin(
+            column_mapping,
+            skip_first_line,
+            speed_settings,
+            processed,
+            start_offset,
+            resume=resume is not None,
+            end_row=end_row,
+            follow=follow,
+        )
+    profiler = None
+    producer_profile_path = None
+    if profile_path is not None:
+        base, extension = os.path.splitext(profile_path)
+        producer_profile_path = f"{base}{PIPELINE_PROFILE_SUFFIX}{extension}"
+        profiler = cProfile.Profile()
+        profiler.enable()
+    clock = time.perf_counter
+    completed = False
+    stalls = 0
+    stall_total = 0.0
+
+    def row_counters():
+        return {
+            "processed": processed,
+            "invalid": invalid,
+            "skipped": skipped,
+            "unconfirmed": unconfirmed,
+        }
+
+    rejected = None
+    unconfirmed_rows = None
+    incomplete_row = 0
+    halt = threading.Event()
+    if follow:
+        logging.info("Acompanhando novas linhas de %s", file_path)
+        records = follow_data_records(
+            file_path, skip_first_line, should_stop, halt, processed, start_offset
+        )
+    else:
+        records = iter_data_records(file_path, skip_first_line, processed, start_offset)
+    pipeline = RowPipeline(
+        records, project, processed, end_row, halt=halt, profile_path=producer_profile_path
+    )
+    try:
+        while True:
+            row_started = clock()
+            item = pipeline.get(should_stop)
+            if item is None:
+                if pipeline.finished and not (follow and should_stop.is_set()):
+                    completed = True
+                else:
+                    logging.info("Processamento interrompido pelo usuário")
+                break
+            received = clock()
+            end_offset, record, (parse_time, map_time, validate_time), row = item
+            stall = received - row_started
+            if stall >= PIPELINE_STALL_SECONDS:
+                stalls += 1
+                stall_total += stall
+            if pipeline_stats is not None:
+                pipeline_stats.update(pipeline.depth(), stall)
+            if not scheduler.checkpoint():
+                logging.info("Processamento interrompido pelo usuário")
+                break
+            resumed = clock()
+            values = record.values
+            typed = False
+            if record.errors:
+                invalid += 1
+                logging.debug("Linha %s inválida: %s", processed + 1, "; ".join(record.errors))
+                if rejected is None:
+                    rejected = RejectedRowsWriter(
+                        file_path,
+                        get_csv_index(file_path),
+                        append=resume is not None,
+                        path=rejected_rows_path(file_path, REJECTED_RUN_SUFFIX),
+                    )
+                rejected.add(processed + 1, record.errors, row)
+            elif submitted is not None and record.objeto in submitted:
+                skipped += 1
+                logging.info("Linha %s ignorada: objeto %s já enviado", processed + 1, record.objeto)
+            else:
+                typed = True
+                waited_before = scheduler.waited
+                if pacing is not None:
+                    timings = pacing.timings()
+                if journal is not None:
+                    journal.mark_inflight(processed)
+                try:
+                    if probe is not None:
+                        probe.prepare()
+                    sent = emit_record(sink, values, emit_mode, timings, scheduler, plan)
+                except BaseException:
+                    if journal is not None:
+                        journal.abort_inflight(processed)
+                    raise
+                if not sent:
+                    if journal is not None:
+                        journal.abort_inflight(processed)
+                    incomplete_row = processed + 1
+                    logging.warning(
+                        "Linha %s interrompida no meio do registro; o formulário de destino"
+                        " ficou incompleto e a linha será digitada de novo ao retomar",
+                        incomplete_row,
+                    )
+                    break
+                emitted = clock()
+                if probe is not None and not should_stop.is_set():
+                    confirmed = probe.confirm(values)
+                    if not confirmed:
+                        unconfirmed += 1
+                        logging.warning("Linha %s não confirmada pelo destino", processed + 1)
+                        if unconfirmed_rows is None:
+                            unconfirmed_rows = RejectedRowsWriter(
+                                file_path,
+                                get_csv_index(file_path),
+                                append=resume is not None,
+                                path=rejected_rows_path(file_path, UNCONFIRMED_SUFFIX),
+                            )
+                        unconfirmed_rows.add(processed + 1, [UNCONFIRMED_ERROR], row)
+                    if pacing is not None:
+                        pacing.record_result(confirmed)
+                else:
+                    confirmed = True
+                if submitted is not None and confirmed:
+                    submitted.add(record.objeto)
+            processed += 1
+            if journal is not None:
+                journal.commit(processed, end_offset)
+            on_progress(processed, max(total, processed), invalid, skipped, unconfirmed)
+            if metrics is not None:
+                finished = clock()
+                metrics.observe("parse", parse_time)
+                metrics.observe("map", map_time)
+                metrics.observe("validate", validate_time)
+                metrics.observe("stall", received - row_started)
+                if typed:
+                    waited = scheduler.waited - waited_before
+                    metrics.observe("inject", emitted - resumed - waited)
+                    metrics.observe("settle", waited + finished - emitted)
+                metrics.observe("row", finished - row_started - (resumed - received))
+                metrics.maybe_flush(row_counters())
+    finally:
+        pipeline.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            logging.info(
+                "Perfil da execução salvo em %s (leitura em %s)", profile_path, producer_profile_path
+            )
+        sink.close()
+        if rejected is not None:
+            rejected.close()
+        if unconfirmed_rows is not None:
+            unconfirmed_rows.close()
+        if submitted is not None:
+            submitted.flush()
+        if journal is not None:
+            journal.finish(completed)
+        if metrics is not None:
+            metrics.flush(row_counters())
+    if pacing is not None:
+        logging.info(
+            "Ritmo final: %.2fx (%s confirmadas, %s não confirmadas)",
+            pacing.rate,
+            pacing.confirmed,
+            pacing.unconfirmed,
+        )
+    if rejected is not None:
+        logging.warning(
+            "%s linha(s) inválida(s) não digitada(s); detalhes em %s",
+            invalid,
+            rejected.path,
+        )
+    if unconfirmed_rows is not None:
+        logging.warning(
+            "%s linha(s) digitada(s) sem confirmação do destino; confira e redigite as de %s",
+            unconfirmed,
+            unconfirmed_rows.path,
+        )
+    if skipped:
+        logging.info("%s linha(s) ignorada(s) por objeto já enviado", skipped)
+    if stalls:
+        logging.info(
+            "Leitura antecipada: %s espera(s) pela fila, %.1f ms no total",
+            stalls,
+            stall_total * 1000,
+        )
+    accuracy = scheduler.accuracy()
+    logging.info(
+        "Processamento finalizado (atraso médio de espera %.1f ms, máximo %.1f ms)",
+        accuracy["mean_lateness"] * 1000,
+        accuracy["max_lateness"] * 1000,
+    )
+    return {
+        "processed": processed,
+        "total": max(total, processed),
+        "invalid": invalid,
+        "unconfirmed": unconfirmed,
+        "skipped": skipped,
+        "completed": completed,
+        "rejected_path": rejected.path if rejected is not None else "",
+        "unconfirmed_path": unconfirmed_rows.path if unconfirmed_rows is not None else "",
+        "incomplete_row": incomplete_row,
+        "rate": pacing.rate if pacing is not None else 1.0,
+        "timing": accuracy,
+    }
+
+
+@dataclass
+class JobResult:
+    file_path: str
+    status: str
+    processed: int = 0
+    total: int = 0
+    invalid: int = 0
+    unconfirmed: int = 0
+    skipped: int = 0
+    rejected_path: str = ""
+    unconfirmed_path: str = ""
+    incomplete_row: int = 0
+    duration: float = 0.0
+    error: str = ""
+
+
+def record_job_result(result):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    record = dict(vars(result), finished_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    with open(JOBS_FILE, "a", encoding="utf-8") as file:
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def profile_run_path(file_path):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(LOG_DIR, f"profile_{source_name(file_path)}_{stamp}.prof")
+
+
+def prepare_job(
+    file_path,
+    column_mapping,
+    skip_first_line,
+    profiles=None,
+    should_stop=None,
+    validate=True,
+    workers=None,
+):
+    key = file_layout_key(file_path)
+    column_mapping = profile_mapping(profiles, key) or column_mapping
+    mapping = resolve_column_mapping(file_path, column_mapping)
+    missing = [FIELD_LABELS[field] for field in REQUIRED_FIELDS if field not in mapping]
+    if missing:
+        raise ValueError(
+            f"Colunas não encontradas em {os.path.basename(file_path)}: {', '.join(missing)}"
+        )
+    if not validate:
+        return mapping, None
+    report = validate_file(
+        file_path, mapping, skip_first_line, workers=workers, should_stop=should_stop
+    )
+    return mapping, report
+
+
+def run_job_queue(
+    file_paths,
+    column_mapping,
+    skip_first_line,
+    on_progress,
+    should_pause,
+    should_stop,
+    speed_settings,
+    on_file_start=None,
+    resume=None,
+    probe=None,
+    use_journal=True,
+    submitted=None,
+    collect_metrics=True,
+    profile=False,
+    start_row=0,
+    end_row=None,
+    sink_factory=None,
+    profiles=None,
+    pipeline_stats=None,
+    follow=False,
+):
+    results = []
+    prefetcher = ThreadPoolExecutor(max_workers=1)
+    pending = None
+    try:
+        if file_paths and resume is None:
+            pending = prefetcher.submit(
+                prepare_job,
+                file_paths[0],
+                column_mapping,
+                skip_first_line,
+                profiles,
+                should_stop,
+                validate=False,
+            )
+        for position, file_path in enumerate(file_paths):
+            current = pending
+            pending = None
+            if position + 1 < len(file_paths):
+                pending = prefetcher.submit(
+                    prepare_job,
+                    file_paths[position + 1],
+                    column_mapping,
+                    skip_first_line,
+                    profiles,
+                    should_stop,
+                    workers=BACKGROUND_VALIDATION_WORKERS,
+                )
+            if should_stop.is_set():
+                break
+            started = time.monotonic()
+            file_resume = resume if position == 0 else None
+            try:
+                if file_resume is not None:
+                    mapping, report = file_resume.column_mapping, None
+                else:
+                    mapping, report = current.result()
+            except Exception as exc:
+                logging.exception("Arquivo ignorado %s: %s", file_path, exc)
+                result = JobResult(file_path=file_path, status="erro", error=str(exc))
+                record_job_result(result)
+                results.append(result)
+                continue
+            if on_file_start is not None:
+                on_file_start(position, len(file_paths), file_path)
+            file_skip = skip_first_line
+            file_speed = speed_settings
+            file_start = start_row if file_resume is None else 0
+            file_end = end_row
+            if file_resume is not None:
+                file_skip = file_resume.skip_first_line
+                file_speed = file_resume.speed_settings
+                if file_resume.end_row is not None:
+                    file_end = min(file_resume.end_row, end_row or file_resume.end_row)
+            try:
+                summary = process_file(
+                    file_path,
+                    mapping,
+                    file_skip,
+                    on_progress,
+                    should_pause,
+                    should_stop,
+                    file_speed,
+                    sink=sink_factory() if sink_factory is not None else None,
+                    journal=ResumeJournal(file_path) if use_journal else None,
+                    resume=file_resume,
+                    probe=probe,
+                    submitted=submitted,
+                    metrics=RunMetrics(file_path) if collect_metrics else None,
+                    profile_path=profile_run_path(file_path) if profile else None,
+                    start_row=file_start,
+                    end_row=file_end,
+                    pipeline_stats=pipeline_stats,
+                    follow=position == len(file_paths) - 1
+                    and (follow or (file_resume is not None and file_resume.follow)),
+                )
+            except Exception as exc:
+                result = JobResult(
+                    file_path=file_path,
+                    status="erro",
+                    duration=time.monotonic() - started,
+                    error=str(exc),
+                )
+                record_job_result(result)
+                results.append(result)
+                raise
+            result = JobResult(
+                file_path=file_path,
+                status="concluído" if summary["completed"] else "interrompido",
+                processed=summary["processed"] - file_start,
+                total=max(summary["total"] - file_start, 0),
+                invalid=summary["invalid"],
+                unconfirmed=summary["unconfirmed"],
+                skipped=summary["skipped"],
+                rejected_path=(
+                    report.rejected_path
+                    if report is not None and report.invalid
+                    else summary["rejected_path"]
+                ),
+                unconfirmed_path=summary["unconfirmed_path"],
+                incomplete_row=summary["incomplete_row"],
+                duration=time.monotonic() - started,
+            )
+            record_job_result(result)
+            results.append(result)
+            if not summary["completed"]:
+                break
+    finally:
+        if pending is not None:
+            pending.cancel()
+        prefetcher.shutdown(wait=not should_stop.is_set(), cancel_futures=True)
+    return results
+
+
+def run_shard_worker(
+    shared_dir,
+    file_path,
+    shard_count,
+    column_mapping,
+    skip_first_line,
+    on_progress,
+    should_pause,
+    should_stop,
+    speed_settings,
+    worker=None,
+    probe=None,
+    submitted=None,
+    sink_factory=None,
+    profiles=None,
+    pipeline_stats=None,
+):
+    coordinator = ShardCoordinator(shared_dir, file_path, skip_first_line, shard_count, worker)
+    mapping, _report = prepare_job(
+        file_path, column_mapping, skip_first_line, profiles, validate=False
+    )
+    results = []
+    while not should_stop.is_set():
+        acquired = coordinator.acquire()
+        if acquired is None:
+            break
+        shard, token = acquired
+        label = f"{file_path} (lote {shard.shard_id + 1} de {len(coordinator.shards)})"
+        if os.path.exists(coordinator.progress_path(shard)) and should_stop.wait(
+            SHARD_SETTLE_SECONDS
+        ):
+            coordinator.release(shard, token)
+            break
+        start_row = coordinator.resume_row(shard)
+        started = time.monotonic()
+        try:
+            summary = process_file(
+                file_path,
+                mapping,
+                skip_first_line,
+                on_progress,
+                should_pause,
+                should_stop,
+                speed_settings,
+                sink=sink_factory() if sink_factory is not None else None,
+                journal=ShardJournal(coordinator, shard, token),
+                probe=probe,
+                submitted=submitted,
+                start_row=start_row,
+                end_row=shard.end_row,
+                pipeline_stats=pipeline_stats,
+            )
+        except ShardLeaseLost as exc:
+            logging.warning("%s", exc)
+            result = JobResult(
+                file_path=label,
+                status="reatribuído",
+                duration=time.monotonic() - started,
+                error=str(exc),
+            )
+            record_job_result(result)
+            results.append(result)
+            continue
+        result = JobResult(
+            file_path=label,
+            status="concluído" if summary["completed"] else "interrompido",
+            processed=summary["processed"] - start_row,
+            total=shard.end_row - start_row,
+            invalid=summary["invalid"],
+            unconfirmed=summary["unconfirmed"],
+            skipped=summary["skipped"],
+            unconfirmed_path=summary["unconfirmed_path"],
+            incomplete_row=summary["incomplete_row"],
+            duration=time.monotonic() - started,
+        )
+        record_job_result(result)
+        results.append(result)
+        if not summary["completed"]:
+            break
+    return results
+
+
+def format_shard_status(coordinator):
+    lines = []
+    for shard, done_rows, state in coordinator.status():
+        lines.append(
+            f"Lote {shard.shard_id + 1}: linhas {shard.start_row + 1}-{shard.end_row},"
+            f" {done_rows}/{shard.end_row - shard.start_row} registradas, {state}"
+        )
+    return "\n".join(lines)
+
+
+def format_job_results(results):
+    lines = []
+    for result in results:
+        line = f"{os.path.basename(result.file_path)}: {result.status}"
+        if result.error:
+            line += f" ({result.error})"
+        else:
+            line += (
+                f" - {result.processed}/{result.total} linhas, {result.invalid} inválidas,"
+                f" {result.skipped} já enviadas, {result.unconfirmed} não confirmadas,"
+                f" {format_duration(result.duration)}"
+            )
+            if result.unconfirmed_path:
+                line += f"\n  não confirmadas em {result.unconfirmed_path}"
+            if result.incomplete_row:
+                line += (
+                    f"\n  linha {result.incomplete_row} interrompida no meio do registro:"
+                    " limpe o formulário de destino antes de retomar"
+                )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class ProgressTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total=0, processed=0):
+        with self._lock:
+            self._processed = processed
+            self._total = total
+            self._invalid = 0
+            self._skipped = 0
+            self._unconfirmed = 0
+
+    def update(self, processed, total, invalid=0, skipped=0, unconfirmed=0):
+        with self._lock:
+            self._processed = processed
+            self._total = total
+            self._invalid = invalid
+            self._skipped = skipped
+            self._unconfirmed = unconfirmed
+
+    def snapshot(self):
+        with self._lock:
+            return (
+                self._processed,
+                self._total,
+                self._invalid,
+                self._skipped,
+                self._unconfirmed,
+            )
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,1064 @@
+import logging
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from dataclasses import replace
+from tkinter import filedialog, messagebox, ttk
+
+from core import (
+    EMIT_MODES,
+    FIELD_LABELS,
+    REQUIRED_FIELDS,
+    AckProbe,
+    AppConfig,
+    ColumnMatcher,
+    ConfigStore,
+    ControlEvent,
+    PipelineStats,
+    ProgressTracker,
+    PyAutoGuiSink,
+    RowRecord,
+    ScreenRegionProbe,
+    SubmittedIndex,
+    build_speed_settings,
+    calibrate_speed,
+    calibrated_profile_name,
+    compile_template,
+    count_lines,
+    ensure_logging,
+    field_templates,
+    format_duration,
+    format_job_results,
+    format_validation_report,
+    get_csv_index,
+    is_supported_input,
+    keyboard_keys,
+    layout_key,
+    load_pyautogui,
+    load_resume_point,
+    make_projector,
+    profile_mapping,
+    read_row_window,
+    resolve_column_mapping,
+    run_job_queue,
+    speed_presets,
+    validate_file,
+)
+
+APP_TITLE = "Importador de Vendas"
+INPUT_FILETYPES = [
+    ("Arquivos CSV e planilhas", "*.csv *.csv.gz *.gz *.zip *.xlsx *.xlsm"),
+    ("Todos os arquivos", "*.*"),
+]
+PROGRESS_POLL_MS = 250
+RATE_WINDOW_SECONDS = 10.0
+PREVIEW_ROWS = 30
+PREVIEW_BLOCK_ROWS = 300
+ECHO_TIMEOUT = 1.0
+ECHO_START_DELAY_MS = 1000
+
+
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        ensure_logging()
+        self.title(APP_TITLE)
+        self.geometry("980x950")
+        self.config_store = ConfigStore()
+        self.config = self.config_store.config
+        self.layout_key = None
+        self.file_path = ""
+        self.file_paths = []
+        self.total_lines = 0
+        self.processing_thread = None
+        self.validation_thread = None
+        self.last_validation = None
+        self.resume_point = None
+        self.progress_tracker = ProgressTracker()
+        self.pipeline_stats = PipelineStats()
+        self.rate_samples = deque()
+        self.progress_after_id = None
+        self.control_condition = threading.Condition()
+        self.pause_event = ControlEvent(self.control_condition)
+        self.stop_event = ControlEvent(self.control_condition)
+        self.countdown_seconds = 5
+        self.countdown_remaining = 0
+        self.countdown_after_id = None
+        self.column_values = []
+        self.column_matcher = ColumnMatcher([])
+        self.preview_top = 0
+        self.preview_block = None
+        self.preview_mapping = {}
+        self.preview_token = 0
+        self.preview_loading = None
+        self.preview_selection = None
+        self.column_search_vars = {}
+        self.has_header = True
+        self.speed_preset_var = tk.StringVar(value=self.config.speed_preset)
+        self.auto_speed_var = tk.BooleanVar(value=self.config.auto_speed)
+        self.skip_submitted_var = tk.BooleanVar(value=self.config.skip_submitted)
+        self.profile_var = tk.BooleanVar(value=False)
+        self.follow_var = tk.BooleanVar(value=False)
+        self.emit_mode_var = tk.StringVar(value=self.config.emit_mode)
+        self.template_var = tk.StringVar(value=self.config.template)
+        self.record_delay_var = tk.StringVar(
+            value="" if self.config.record_delay is None else str(self.config.record_delay)
+        )
+        self.ack_region_var = tk.StringVar(
+            value=",".join(str(value) for value in self.config.ack_region or [])
+        )
+        self._build_ui()
+        self.bind("<Escape>", lambda _event: self.stop_processing())
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def _build_ui(self):
+        self._build_preview()
+
+        file_frame = ttk.LabelFrame(self, text="Arquivo CSV")
+        file_frame.pack(fill="x", padx=10, pady=10)
+
+        self.file_label = ttk.Label(file_frame, text="Nenhum arquivo selecionado")
+        self.file_label.pack(side="left", padx=10, pady=10)
+
+        ttk.Button(file_frame, text="Pasta", command=self.select_folder).pack(
+            side="right", padx=(0, 10), pady=10
+        )
+
+        ttk.Button(file_frame, text="Selecionar", command=self.select_file).pack(
+            side="right", padx=10, pady=10
+        )
+
+        status_frame = ttk.LabelFrame(self, text="Status")
+        status_frame.pack(fill="x", padx=10, pady=10)
+
+        self.total_label = ttk.Label(status_frame, text="Total de linhas: 0")
+        self.total_label.pack(anchor="w", padx=10)
+
+        self.status_label = ttk.Label(status_frame, text="Status: Aguardando")
+        self.status_label.pack(anchor="w", padx=10)
+
+        self.countdown_label = ttk.Label(status_frame, text="Início em: -")
+        self.countdown_label.pack(anchor="w", padx=10)
+
+        self.processed_label = ttk.Label(status_frame, text="Processadas: 0 / 0")
+        self.processed_label.pack(anchor="w", padx=10)
+
+        self.rate_label = ttk.Label(status_frame, text="Velocidade: -")
+        self.rate_label.pack(anchor="w", padx=10)
+
+        self.invalid_label = ttk.Label(status_frame, text="Inválidas: 0")
+        self.invalid_label.pack(anchor="w", padx=10)
+
+        self.skipped_label = ttk.Label(status_frame, text="Já enviadas (ignoradas): 0")
+        self.skipped_label.pack(anchor="w", padx=10)
+
+        self.unconfirmed_label = ttk.Label(status_frame, text="Não confirmadas: 0")
+        self.unconfirmed_label.pack(anchor="w", padx=10)
+
+        self.eta_label = ttk.Label(status_frame, text="Tempo restante: -")
+        self.eta_label.pack(anchor="w", padx=10)
+
+        self.pipeline_label = ttk.Label(status_frame, text="Fila de leitura: -")
+        self.pipeline_label.pack(anchor="w", padx=10)
+
+        self.progress = ttk.Progressbar(status_frame, length=400, mode="determinate")
+        self.progress.pack(fill="x", padx=10, pady=10)
+
+        config_frame = ttk.LabelFrame(self, text="Configuração de Colunas")
+        config_frame.pack(fill="both", padx=10, pady=10, expand=True)
+
+        self.skip_var = tk.BooleanVar(value=self.config.skip_first_line)
+        ttk.Checkbutton(
+            config_frame,
+            text="Pular primeira linha",
+            variable=self.skip_var,
+            command=self.on_skip_toggle,
+        ).grid(row=0, column=0, sticky="w", padx=10, pady=5)
+
+        self.column_vars = {}
+        for idx, field in enumerate(REQUIRED_FIELDS, start=1):
+            ttk.Label(config_frame, text=FIELD_LABELS.get(field, field)).grid(
+                row=idx, column=0, sticky="w", padx=10, pady=5
+            )
+            search_var = tk.StringVar()
+            search_entry = ttk.Entry(config_frame, textvariable=search_var)
+            search_entry.grid(row=idx, column=1, sticky="ew", padx=10, pady=5)
+            search_entry.bind(
+                "<KeyRelease>",
+                lambda event, field=field: self.on_column_search(event, field),
+            )
+
+            var = tk.StringVar()
+            combo = ttk.Combobox(config_frame, textvariable=var, state="readonly")
+            combo.grid(row=idx, column=2, sticky="ew", padx=10, pady=5)
+            combo.bind("<<ComboboxSelected>>", lambda _event: self.on_mapping_change())
+
+            self.column_search_vars[field] = (search_var, search_entry)
+            self.column_vars[field] = (var, combo)
+
+        config_frame.columnconfigure(1, weight=1)
+        config_frame.columnconfigure(2, weight=1)
+
+        ttk.Button(config_frame, text="Salvar configurações", command=self.save_config).grid(
+            row=len(REQUIRED_FIELDS) + 1,
+            column=0,
+            columnspan=3,
+            sticky="ew",
+            padx=10,
+            pady=10,
+        )
+
+        speed_frame = ttk.LabelFrame(self, text="Velocidade da automação")
+        speed_frame.pack(fill="x", padx=10, pady=10)
+
+        ttk.Label(speed_frame, text="Preset").grid(row=0, column=0, sticky="w", padx=10, pady=5)
+        self.speed_combo = ttk.Combobox(
+            speed_frame,
+            textvariable=self.speed_preset_var,
+            values=list(speed_presets(self.config.speed_profiles)),
+            state="readonly",
+        )
+        self.speed_combo.grid(row=0, column=1, sticky="ew", padx=10, pady=5)
+        self.speed_combo.bind("<<ComboboxSelected>>", lambda _event: self.save_config())
+
+        ttk.Label(speed_frame, text="Envio").grid(row=1, column=0, sticky="w", padx=10, pady=5)
+        emit_combo = ttk.Combobox(
+            speed_frame,
+            textvariable=self.emit_mode_var,
+            values=EMIT_MODES,
+            state="readonly",
+        )
+        emit_combo.grid(row=1, column=1, sticky="ew", padx=10, pady=5)
+        emit_combo.bind("<<ComboboxSelected>>", lambda _event: self.save_config())
+
+        ttk.Label(speed_frame, text="Modelo do formulário").grid(
+            row=2, column=0, sticky="w", padx=10, pady=5
+        )
+        template_combo = ttk.Combobox(
+            speed_frame,
+            textvariable=self.template_var,
+            values=list(field_templates(self.config.templates)),
+            state="readonly",
+        )
+        template_combo.grid(row=2, column=1, sticky="ew", padx=10, pady=5)
+        template_combo.bind("<<ComboboxSelected>>", lambda _event: self.save_config())
+
+        ttk.Label(speed_frame, text="Pausa por registro (s)").grid(
+            row=3, column=0, sticky="w", padx=10, pady=5
+        )
+        record_delay_spin = ttk.Spinbox(
+            speed_frame,
+            textvariable=self.record_delay_var,
+            from_=0,
+            to=10,
+            increment=0.05,
+            command=self.save_config,
+        )
+        record_delay_spin.grid(row=3, column=1, sticky="ew", padx=10, pady=5)
+        record_delay_spin.bind("<FocusOut>", lambda _event: self.save_config())
+
+        ttk.Checkbutton(
+            speed_frame,
+            text="Modo automático (ajusta pela confirmação)",
+            variable=self.auto_speed_var,
+            command=self.save_config,
+        ).grid(row=4, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+
+        ttk.Checkbutton(
+            speed_frame,
+            text="Ignorar objetos já enviados",
+            variable=self.skip_submitted_var,
+            command=self.save_config,
+        ).grid(row=6, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+
+        ttk.Checkbutton(
+            speed_frame,
+            text="Perfilar a próxima execução (cProfile)",
+            variable=self.profile_var,
+        ).grid(row=7, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+
+        ttk.Checkbutton(
+            speed_frame,
+            text="Acompanhar novas linhas do arquivo (até Parar)",
+            variable=self.follow_var,
+        ).grid(row=8, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+
+        ttk.Button(speed_frame, text="Calibrar velocidade", command=self.open_calibration).grid(
+            row=9, column=0, columnspan=2, sticky="ew", padx=10, pady=5
+        )
+
+        ttk.Label(speed_frame, text="Região de confirmação").grid(
+            row=5, column=0, sticky="w", padx=10, pady=5
+        )
+        ack_region_entry = ttk.Entry(speed_frame, textvariable=self.ack_region_var)
+        ack_region_entry.grid(row=5, column=1, sticky="ew", padx=10, pady=5)
+        ack_region_entry.bind("<FocusOut>", lambda _event: self.save_config())
+
+        speed_frame.columnconfigure(1, weight=1)
+
+        control_frame = ttk.Frame(self)
+        control_frame.pack(fill="x", padx=10, pady=10)
+
+        self.validate_button = ttk.Button(
+            control_frame, text="Validar", command=self.start_validation
+        )
+        self.validate_button.pack(side="left", padx=5)
+
+        self.start_button = ttk.Button(control_frame, text="Iniciar", command=self.start_processing)
+        self.start_button.pack(side="left", padx=5)
+
+        self.resume_button = ttk.Button(
+            control_frame, text="Retomar", command=self.resume_processing, state="disabled"
+        )
+        self.resume_button.pack(side="left", padx=5)
+
+        self.pause_button = ttk.Button(control_frame, text="Pausar", command=self.toggle_pause)
+        self.pause_button.pack(side="left", padx=5)
+
+        self.stop_button = ttk.Button(control_frame, text="Parar", command=self.stop_processing)
+        self.stop_button.pack(side="left", padx=5)
+
+    def _build_preview(self):
+        preview_frame = ttk.LabelFrame(self, text="Pré-visualização")
+        preview_frame.pack(side="right", fill="both", expand=True, padx=10, pady=10)
+
+        jump_frame = ttk.Frame(preview_frame)
+        jump_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(jump_frame, text="Ir para a linha").pack(side="left")
+        self.preview_jump_var = tk.StringVar()
+        jump_entry = ttk.Entry(jump_frame, textvariable=self.preview_jump_var, width=12)
+        jump_entry.pack(side="left", padx=5)
+        jump_entry.bind("<Return>", lambda _event: self.jump_to_row())
+        ttk.Button(jump_frame, text="Ir", command=self.jump_to_row).pack(side="left")
+        self.preview_position_label = ttk.Label(jump_frame, text="")
+        self.preview_position_label.pack(side="right")
+
+        table_frame = ttk.Frame(preview_frame)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        columns = ["LINHA"] + REQUIRED_FIELDS
+        self.preview_tree = ttk.Treeview(
+            table_frame, columns=columns, show="headings", height=PREVIEW_ROWS, selectmode="browse"
+        )
+        self.preview_tree.heading("LINHA", text="Linha")
+        self.preview_tree.column("LINHA", width=70, anchor="e", stretch=False)
+        for field in REQUIRED_FIELDS:
+            self.preview_tree.heading(field, text=FIELD_LABELS.get(field, field))
+            self.preview_tree.column(field, width=90)
+        self.preview_tree.tag_configure("invalid", background="#f8d7da")
+        self.preview_tree.pack(side="left", fill="both", expand=True)
+        self.preview_scrollbar = ttk.Scrollbar(
+            table_frame, orient="vertical", command=self.on_preview_scroll
+        )
+        self.preview_scrollbar.pack(side="right", fill="y")
+        self.preview_tree.bind("<MouseWheel>", self.on_preview_wheel)
+        self.preview_tree.bind("<Button-4>", lambda _event: self.scroll_preview(-3))
+        self.preview_tree.bind("<Button-5>", lambda _event: self.scroll_preview(3))
+
+    def select_file(self):
+        file_paths = filedialog.askopenfilenames(filetypes=INPUT_FILETYPES)
+        if not file_paths:
+            return
+        self.set_files(list(file_paths))
+
+    def select_folder(self):
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        file_paths = sorted(
+            os.path.join(folder, name)
+            for name in os.listdir(folder)
+            if is_supported_input(name)
+        )
+        if not file_paths:
+            messagebox.showwarning("Aviso", "Nenhum arquivo CSV encontrado na pasta.")
+            return
+        self.set_files(file_paths)
+
+    def set_files(self, file_paths):
+        self.file_paths = file_paths
+        self.file_path = file_paths[0]
+        if len(file_paths) == 1:
+            self.file_label.config(text=os.path.basename(self.file_path))
+        else:
+            self.file_label.config(text=f"{len(file_paths)} arquivos na fila")
+        self.update_columns()
+        self.update_total_lines()
+        self.preview_top = 0
+        self.refresh_preview()
+        self.update_resume_state()
+        self.status_label.config(text="Status: Aguardando")
+
+    def update_resume_state(self):
+        self.resume_point = None
+        if self.file_path:
+            try:
+                self.resume_point = load_resume_point(self.file_path)
+            except Exception as exc:
+                logging.exception("Erro ao ler o diário de retomada: %s", exc)
+        if self.resume_point is None:
+            self.resume_button.config(state="disabled", text="Retomar")
+        else:
+            self.resume_button.config(
+                state="normal", text=f"Retomar (linha {self.resume_point.row + 1})"
+            )
+
+    def update_columns(self):
+        columns = []
+        self.layout_key = None
+        if self.file_path:
+            index = get_csv_index(self.file_path)
+            self.has_header = index.has_header
+            if index.has_header:
+                columns = [col.strip() for col in index.header]
+                self.layout_key = layout_key(index.header)
+        if not columns:
+            columns = [str(i) for i in range(1, 51)]
+            self.has_header = False
+        self.column_values = columns
+        self.column_matcher = ColumnMatcher(columns)
+        saved_mapping = profile_mapping(self.config.profiles, self.layout_key)
+        if saved_mapping is not None:
+            logging.info("Perfil de colunas %s aplicado", self.layout_key)
+        else:
+            saved_mapping = self.config.column_mapping
+
+        for field, (var, combo) in self.column_vars.items():
+            combo["values"] = [""] + columns
+            saved = saved_mapping.get(field)
+            if saved in columns:
+                var.set(saved)
+            elif self.has_header:
+                best = self.column_matcher.best_match(field)
+                if best is not None:
+                    var.set(best)
+                else:
+                    var.set("")
+            elif columns:
+                var.set("")
+
+        self.save_config()
+
+    def on_column_search(self, event, field):
+        filtered = self.column_matcher.search(event.widget.get())
+        _search_var, _search_entry = self.column_search_vars.get(field, (None, None))
+        _var, combo = self.column_vars.get(field, (None, None))
+        if combo is not None:
+            combo["values"] = [""] + filtered
+
+    def on_mapping_change(self):
+        self.save_config()
+        self.refresh_preview()
+
+    def refresh_preview(self):
+        self.preview_block = None
+        self.preview_token += 1
+        self.preview_loading = None
+        self.preview_mapping = {}
+        if self.file_path:
+            try:
+                self.preview_mapping = self.resolve_mapping()
+            except Exception as exc:
+                logging.exception("Erro ao preparar pré-visualização: %s", exc)
+        self.render_preview(self.preview_top)
+
+    def preview_rows(self, top):
+        if self.preview_block is not None:
+            block_start, rows = self.preview_block
+            at_end = len(rows) < PREVIEW_BLOCK_ROWS + PREVIEW_ROWS
+            if block_start <= top and (top + PREVIEW_ROWS <= block_start + len(rows) or at_end):
+                return rows[top - block_start : top - block_start + PREVIEW_ROWS]
+        block_start = top // PREVIEW_BLOCK_ROWS * PREVIEW_BLOCK_ROWS
+        if self.preview_loading != block_start:
+            self.preview_loading = block_start
+            threading.Thread(
+                target=self._load_preview_block,
+                args=(self.preview_token, self.file_path, self.skip_var.get(), block_start),
+                daemon=True,
+            ).start()
+        return None
+
+    def _load_preview_block(self, token, file_path, skip_first_line, block_start):
+        try:
+            rows = read_row_window(
+                file_path, skip_first_line, block_start, PREVIEW_BLOCK_ROWS + PREVIEW_ROWS
+            )
+        except Exception as exc:
+            logging.exception("Erro ao ler pré-visualização: %s", exc)
+            rows = []
+        self.after(0, lambda: self._on_preview_block(token, block_start, rows))
+
+    def _on_preview_block(self, token, block_start, rows):
+        if token != self.preview_token or block_start != self.preview_loading:
+            return
+        self.preview_loading = None
+        self.preview_block = (block_start, rows)
+        self.render_preview(self.preview_top)
+
+    def render_preview(self, top):
+        total = self.total_lines if self.file_path else 0
+        top = max(min(top, total - PREVIEW_ROWS), 0)
+        self.preview_top = top
+        rows = []
+        if total:
+            rows = self.preview_rows(top)
+            if rows is None:
+                self.preview_scrollbar.set(top / total, min((top + PREVIEW_ROWS) / total, 1.0))
+                self.preview_position_label.config(text=f"Carregando a linha {top + 1}...")
+                return
+        self.preview_tree.delete(*self.preview_tree.get_children())
+        project = make_projector(self.preview_mapping)
+        for offset, row in enumerate(rows):
+            values = project(row)
+            tags = ("invalid",) if self.preview_mapping and RowRecord(values).errors else ()
+            self.preview_tree.insert(
+                "", "end", iid=str(offset), values=(top + offset + 1,) + values, tags=tags
+            )
+        if self.preview_selection is not None:
+            target = str(self.preview_selection - top)
+            if self.preview_tree.exists(target):
+                self.preview_tree.selection_set(target)
+                self.preview_tree.see(target)
+            self.preview_selection = None
+        if total:
+            self.preview_scrollbar.set(top / total, min((top + PREVIEW_ROWS) / total, 1.0))
+            last = top + len(rows)
+            self.preview_position_label.config(text=f"{top + 1}-{last} de {total}")
+        else:
+            self.preview_scrollbar.set(0.0, 1.0)
+            self.preview_position_label.config(text="")
+
+    def on_preview_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.render_preview(int(float(amount) * self.total_lines))
+        elif action == "scroll":
+            step = PREVIEW_ROWS if unit == "pages" else 1
+            self.scroll_preview(int(amount) * step)
+
+    def on_preview_wheel(self, event):
+        self.scroll_preview(-3 if event.delta > 0 else 3)
+
+    def scroll_preview(self, rows):
+        self.render_preview(self.preview_top + rows)
+
+    def jump_to_row(self):
+        try:
+            row = int(self.preview_jump_var.get())
+        except ValueError:
+            messagebox.showerror("Erro", "Informe o número da linha.")
+            return
+        self.preview_selection = row - 1
+        self.render_preview(row - 1)
+
+    def update_total_lines(self):
+        if not self.file_path:
+            self.total_lines = 0
+            self.total_label.config(text="Total de linhas: 0")
+            return
+        try:
+            self.total_lines = count_lines(self.file_path, self.skip_var.get())
+            self.total_label.config(text=f"Total de linhas: {self.total_lines}")
+        except Exception as exc:
+            logging.exception("Erro ao contar linhas: %s", exc)
+            messagebox.showerror("Erro", "Não foi possível ler o arquivo CSV.")
+
+    def save_config(self):
+        mapping = {}
+        for field, (var, _combo) in self.column_vars.items():
+            if var.get():
+                mapping[field] = var.get()
+        profiles = dict(self.config.profiles or {})
+        if self.layout_key is not None and mapping:
+            profiles[self.layout_key] = {"column_mapping": mapping}
+        self.config = AppConfig(
+            column_mapping=mapping,
+            skip_first_line=self.skip_var.get(),
+            speed_preset=self.speed_preset_var.get(),
+            auto_speed=self.auto_speed_var.get(),
+            emit_mode=self.emit_mode_var.get(),
+            record_delay=self.get_record_delay(),
+            ack_region=self.get_ack_region(),
+            skip_submitted=self.skip_submitted_var.get(),
+            profiles=profiles,
+            speed_profiles=self.config.speed_profiles,
+            template=self.template_var.get(),
+            templates=self.config.templates,
+        )
+        self.config_store.update(self.config)
+
+    def on_skip_toggle(self):
+        self.save_config()
+        self.update_total_lines()
+        self.refresh_preview()
+
+    def resolve_mapping(self):
+        if not self.file_path:
+            return {}
+        return resolve_column_mapping(self.file_path, self.config.column_mapping)
+
+    def start_validation(self):
+        if not self.file_path:
+            messagebox.showwarning("Aviso", "Selecione um arquivo CSV primeiro.")
+            return
+        if self.validation_thread and self.validation_thread.is_alive():
+            messagebox.showinfo("Info", "Validação já está em andamento.")
+            return
+        mapping = self.resolve_mapping()
+        if not mapping or any(field not in mapping for field in REQUIRED_FIELDS):
+            messagebox.showwarning("Aviso", "Configure todas as colunas antes de validar.")
+            return
+        self.status_label.config(text="Status: Validando")
+        self.validate_button.config(state="disabled")
+        self.validation_thread = threading.Thread(
+            target=self._run_validation,
+            args=(mapping,),
+            daemon=True,
+        )
+        self.validation_thread.start()
+
+    def _run_validation(self, mapping):
+        try:
+            report = validate_file(self.file_path, mapping, self.skip_var.get())
+            self.after(0, lambda: self._show_validation_report(report))
+        except Exception as exc:
+            logging.exception("Erro durante validação: %s", exc)
+            message = str(exc)
+            self.after(0, lambda: messagebox.showerror("Erro", message))
+            self.after(0, lambda: self.status_label.config(text="Status: Erro"))
+        finally:
+            self.after(0, lambda: self.validate_button.config(state="normal"))
+
+    def _show_validation_report(self, report):
+        self.last_validation = report
+        if report.invalid:
+            self.status_label.config(text=f"Status: Validado ({report.invalid} inválidas)")
+            messagebox.showwarning("Validação", format_validation_report(report))
+        else:
+            self.status_label.config(text="Status: Validado")
+            messagebox.showinfo("Validação", format_validation_report(report))
+
+    def resume_processing(self):
+        if self.resume_point is None:
+            return
+        self.start_processing(resume=self.resume_point)
+
+    def start_processing(self, resume=None):
+        if not self.file_path:
+            messagebox.showwarning("Aviso", "Selecione um arquivo CSV primeiro.")
+            return
+        if self.processing_thread and self.processing_thread.is_alive():
+            messagebox.showinfo("Info", "Processamento já está em andamento.")
+            return
+        if load_pyautogui() is None:
+            messagebox.showerror(
+                "Erro",
+                "pyautogui não está instalado. Instale para habilitar a automação.",
+            )
+            return
+        self.stop_event.clear()
+        self.pause_event.clear()
+        self.progress["value"] = 0
+        mapping = self.resolve_mapping() if resume is None else resume.column_mapping
+        if not mapping or any(field not in mapping for field in REQUIRED_FIELDS):
+            messagebox.showwarning("Aviso", "Configure todas as colunas antes de iniciar.")
+            return
+        if resume is None:
+            try:
+                compile_template(self.get_speed_settings()["template"], keyboard_keys())
+            except ValueError as exc:
+                messagebox.showerror("Erro", f"Modelo do formulário inválido: {exc}")
+                return
+        self.set_controls_state("countdown")
+        if self.countdown_after_id is not None:
+            self.after_cancel(self.countdown_after_id)
+            self.countdown_after_id = None
+        self.countdown_remaining = self.countdown_seconds
+        self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
+        self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
+        self.update_idletasks()
+        self._update_countdown(mapping, resume)
+
+    def _update_countdown(self, mapping, resume=None):
+        if self.stop_event.is_set():
+            self._reset_countdown_ui(status="Status: Parado")
+            self.set_controls_state("idle")
+            return
+        if self.pause_event.is_set():
+            self.status_label.config(text="Status: Pausado (contagem)")
+            self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
+            self.countdown_after_id = self.after(
+                200, lambda: self._update_countdown(mapping, resume)
+            )
+            return
+        if self.countdown_remaining <= 0:
+            self.status_label.config(text="Status: Processando")
+            self.countdown_label.config(text="Início em: 0s")
+            self.progress_tracker.reset(self.total_lines, resume.row if resume else 0)
+            self.pipeline_stats.reset()
+            self.processing_thread = threading.Thread(
+                target=self._run_processing,
+                args=(mapping, resume),
+                daemon=True,
+            )
+            self.processing_thread.start()
+            self.set_controls_state("processing")
+            self.start_progress_polling()
+            return
+        self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
+        self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
+        self.countdown_remaining -= 1
+        self.countdown_after_id = self.after(
+            1000, lambda: self._update_countdown(mapping, resume)
+        )
+
+    def _run_processing(self, mapping, resume=None):
+        if resume is None:
+            skip_first_line = self.skip_var.get()
+            speed_settings = self.get_speed_settings()
+        else:
+            skip_first_line = resume.skip_first_line
+            speed_settings = resume.speed_settings
+        submitted = None
+        try:
+            if self.config.skip_submitted:
+                submitted = SubmittedIndex()
+            probe = None
+            if speed_settings["auto_speed"] and self.config.ack_region:
+                probe = ScreenRegionProbe(self.config.ack_region)
+            results = run_job_queue(
+                self.file_paths,
+                self.config.column_mapping,
+                skip_first_line,
+                self.update_progress,
+                self.pause_event,
+                self.stop_event,
+                speed_settings,
+                on_file_start=self.on_file_start,
+                resume=resume,
+                probe=probe,
+                submitted=submitted,
+                profile=self.profile_var.get(),
+                profiles=self.config.profiles,
+                pipeline_stats=self.pipeline_stats,
+                follow=self.follow_var.get(),
+            )
+            self.after(0, lambda: self.profile_var.set(False))
+            summary = format_job_results(results)
+            if any(result.incomplete_row for result in results):
+                self.after(0, lambda: messagebox.showwarning("Registro incompleto", summary))
+            elif any(result.unconfirmed for result in results):
+                self.after(0, lambda: messagebox.showwarning("Linhas não confirmadas", summary))
+            elif len(self.file_paths) > 1:
+                self.after(0, lambda: messagebox.showinfo("Fila concluída", summary))
+            self.after(0, lambda: self.status_label.config(text="Status: Finalizado"))
+            self.after(0, lambda: self._reset_countdown_ui())
+            self.after(0, lambda: self.set_controls_state("idle"))
+        except Exception as exc:
+            logging.exception("Erro durante processamento: %s", exc)
+            message = str(exc)
+            self.after(0, lambda: messagebox.showerror("Erro", message))
+            self.after(0, lambda: self.status_label.config(text="Status: Erro"))
+            self.after(0, lambda: self._reset_countdown_ui())
+            self.after(0, lambda: self.set_controls_state("idle"))
+        finally:
+            if submitted is not None:
+                submitted.close()
+
+    def update_progress(self, processed, total, invalid=0, skipped=0, unconfirmed=0):
+        self.progress_tracker.update(processed, total, invalid, skipped, unconfirmed)
+
+    def on_file_start(self, position, count, file_path):
+        if position > 0:
+            self.progress_tracker.reset(count_lines(file_path, self.skip_var.get()))
+            self.after(0, self.rate_samples.clear)
+        if count > 1:
+            label = f"Arquivo {position + 1}/{count}: {os.path.basename(file_path)}"
+            self.after(0, lambda: self.file_label.config(text=label))
+
+    def start_progress_polling(self):
+        self.rate_samples.clear()
+        if self.progress_after_id is None:
+            self._poll_progress()
+
+    def _poll_progress(self):
+        running = self.processing_thread is not None and self.processing_thread.is_alive()
+        processed, total, invalid, skipped, unconfirmed = self.progress_tracker.snapshot()
+        now = time.monotonic()
+        self.rate_samples.append((now, processed))
+        while len(self.rate_samples) > 2 and now - self.rate_samples[0][0] > RATE_WINDOW_SECONDS:
+            self.rate_samples.popleft()
+        first_time, first_processed = self.rate_samples[0]
+        rate = 0.0
+        if now > first_time:
+            rate = (processed - first_processed) / (now - first_time)
+
+        self.progress["maximum"] = max(total, 1)
+        self.progress["value"] = processed
+        self.total_label.config(text=f"Total de linhas: {total}")
+        self.processed_label.config(text=f"Processadas: {processed} / {total}")
+        self.invalid_label.config(text=f"Inválidas: {invalid}")
+        self.skipped_label.config(text=f"Já enviadas (ignoradas): {skipped}")
+        self.unconfirmed_label.config(text=f"Não confirmadas: {unconfirmed}")
+        if rate > 0:
+            self.rate_label.config(text=f"Velocidade: {rate:.1f} linhas/s")
+            remaining = max(total - processed, 0) / rate
+            self.eta_label.config(text=f"Tempo restante: {format_duration(remaining)}")
+        else:
+            self.rate_label.config(text="Velocidade: -")
+            self.eta_label.config(text="Tempo restante: -")
+        depth, capacity, stalls, stall_seconds = self.pipeline_stats.snapshot()
+        self.pipeline_label.config(
+            text=(
+                f"Fila de leitura: {depth}/{capacity} linhas,"
+                f" esperas: {stalls} ({stall_seconds:.1f}s)"
+            )
+        )
+
+        if running:
+            self.progress_after_id = self.after(PROGRESS_POLL_MS, self._poll_progress)
+        else:
+            self.progress_after_id = None
+
+    def toggle_pause(self):
+        in_countdown = self.countdown_remaining > 0 and (
+            self.processing_thread is None or not self.processing_thread.is_alive()
+        )
+        in_processing = self.processing_thread is not None and self.processing_thread.is_alive()
+
+        if not (in_countdown or in_processing):
+            return
+
+        if self.pause_event.is_set():
+            self.pause_event.clear()
+            self.pause_button.config(text="Pausar")
+            if in_countdown:
+                self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
+            else:
+                self.status_label.config(text="Status: Processando")
+        else:
+            self.pause_event.set()
+            self.pause_button.config(text="Continuar")
+            if in_countdown:
+                self.status_label.config(text="Status: Pausado (contagem)")
+            else:
+                self.status_label.config(text="Status: Pausado")
+
+    def stop_processing(self):
+        if self.countdown_remaining > 0:
+            self.stop_event.set()
+            if self.countdown_after_id is not None:
+                self.after_cancel(self.countdown_after_id)
+                self.countdown_after_id = None
+            self._reset_countdown_ui(status="Status: Parado")
+            self.set_controls_state("idle")
+            return
+        if not self.processing_thread or not self.processing_thread.is_alive():
+            return
+        self.stop_event.set()
+        self.pause_event.clear()
+        self.pause_button.config(text="Pausar")
+        self.status_label.config(text="Status: Parando")
+
+    def _reset_countdown_ui(self, status=None):
+        self.countdown_remaining = 0
+        self.countdown_label.config(text="Início em: -")
+        if status is not None:
+            self.status_label.config(text=status)
+
+    def on_close(self):
+        self.stop_event.set()
+        self.save_config()
+        self.config_store.flush()
+        self.destroy()
+
+    def get_record_delay(self):
+        try:
+            return max(float(self.record_delay_var.get().replace(",", ".")), 0.0)
+        except ValueError:
+            return None
+
+    def get_ack_region(self):
+        try:
+            region = [int(value) for value in self.ack_region_var.get().split(",")]
+        except ValueError:
+            return None
+        if len(region) != 4 or region[2] <= 0 or region[3] <= 0:
+            return None
+        return region
+
+    def get_speed_settings(self):
+        return build_speed_settings(
+            self.speed_preset_var.get(),
+            self.emit_mode_var.get(),
+            self.get_record_delay(),
+            self.auto_speed_var.get(),
+            self.config.speed_profiles,
+            self.template_var.get(),
+            self.config.templates,
+        )
+
+    def open_calibration(self):
+        if self.processing_thread is not None and self.processing_thread.is_alive():
+            messagebox.showwarning("Aviso", "Aguarde o processamento terminar.")
+            return
+        if load_pyautogui() is None:
+            messagebox.showerror("Erro", "pyautogui não está instalado.")
+            return
+        CalibrationWindow(self)
+
+    def on_calibrated(self, profile):
+        name = calibrated_profile_name()
+        speed_profiles = dict(self.config.speed_profiles or {})
+        speed_profiles[name] = profile
+        self.config = replace(self.config, speed_profiles=speed_profiles)
+        self.speed_combo["values"] = list(speed_presets(speed_profiles))
+        self.speed_preset_var.set(name)
+        self.save_config()
+        messagebox.showinfo(
+            "Calibração concluída",
+            f"Perfil \"{name}\" salvo: {profile['key_interval'] * 1000:.1f} ms por tecla, "
+            f"{profile['field_delay'] * 1000:.0f} ms entre campos.",
+        )
+
+    def set_controls_state(self, state):
+        if state == "idle":
+            self.start_button.config(state="normal")
+            self.pause_button.config(state="disabled", text="Pausar")
+            self.stop_button.config(state="disabled")
+            self.update_resume_state()
+        elif state == "countdown":
+            self.start_button.config(state="disabled")
+            self.resume_button.config(state="disabled")
+            self.pause_button.config(state="normal")
+            self.stop_button.config(state="normal")
+        elif state == "processing":
+            self.start_button.config(state="disabled")
+            self.resume_button.config(state="disabled")
+            self.pause_button.config(state="normal")
+            self.stop_button.config(state="normal")
+
+
+class CalibrationWindow(tk.Toplevel, AckProbe):
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Calibrar velocidade")
+        self.geometry("360x360")
+        self.transient(app)
+        self.submitted = []
+        self._seen = 0
+        self.thread = None
+        self.control_condition = threading.Condition()
+        self.pause_event = ControlEvent(self.control_condition)
+        self.stop_event = ControlEvent(self.control_condition)
+
+        ttk.Label(
+            self,
+            text=(
+                "A calibração digita valores de teste nos campos abaixo e mede a menor "
+                "velocidade segura. Não use o teclado nem o mouse até terminar."
+            ),
+            wraplength=320,
+        ).pack(fill="x", padx=10, pady=10)
+
+        form = ttk.Frame(self)
+        form.pack(fill="x", padx=10)
+        self.entries = []
+        for idx, field in enumerate(REQUIRED_FIELDS):
+            ttk.Label(form, text=FIELD_LABELS.get(field, field)).grid(
+                row=idx, column=0, sticky="w", pady=3
+            )
+            entry = ttk.Entry(form)
+            entry.grid(row=idx, column=1, sticky="ew", padx=(10, 0), pady=3)
+            entry.bind("<Return>", lambda _event, idx=idx: self.on_return(idx))
+            self.entries.append(entry)
+        form.columnconfigure(1, weight=1)
+
+        self.status_label = ttk.Label(self, text="Status: Aguardando")
+        self.status_label.pack(anchor="w", padx=10, pady=10)
+
+        buttons = ttk.Frame(self)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        self.start_button = ttk.Button(buttons, text="Iniciar", command=self.start)
+        self.start_button.pack(side="left", padx=5)
+        ttk.Button(buttons, text="Cancelar", command=self.close).pack(side="left", padx=5)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def on_return(self, idx):
+        if idx + 1 < len(self.entries):
+            self.entries[idx + 1].focus_set()
+            return "break"
+        self.submitted.append([entry.get() for entry in self.entries])
+        self._clear()
+        return "break"
+
+    def _clear(self):
+        for entry in self.entries:
+            entry.delete(0, "end")
+        self.entries[0].focus_set()
+
+    def start(self):
+        self.start_button.config(state="disabled")
+        self.status_label.config(text="Status: Iniciando...")
+        self.focus_force()
+        self.entries[0].focus_set()
+        self.after(ECHO_START_DELAY_MS, self._start_thread)
+
+    def _start_thread(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            profile = calibrate_speed(
+                PyAutoGuiSink(),
+                self,
+                self.pause_event,
+                self.stop_event,
+                on_step=lambda message: self.after(
+                    0, lambda: self.status_label.config(text=f"Status: {message}")
+                ),
+            )
+        except Exception as exc:
+            logging.exception("Erro na calibração: %s", exc)
+            message = str(exc)
+            self.after(0, lambda: messagebox.showerror("Erro", message, parent=self))
+            self.after(0, self.destroy)
+            return
+        if self.stop_event.is_set():
+            return
+        if profile is None:
+            self.after(
+                0,
+                lambda: messagebox.showerror(
+                    "Erro", "O destino não recebeu os valores nem na velocidade mais lenta.", parent=self
+                ),
+            )
+            self.after(0, self.destroy)
+            return
+        self.app.after(0, self._finish, profile)
+
+    def _finish(self, profile):
+        self.destroy()
+        self.app.on_calibrated(profile)
+
+    def close(self):
+        self.stop_event.set()
+        self.destroy()
+
+    def reset(self):
+        done = threading.Event()
+        self.after(0, lambda: (self._clear(), done.set()))
+        done.wait(ECHO_TIMEOUT)
+
+    def prepare(self):
+        self._seen = len(self.submitted)
+
+    def confirm(self, values):
+        deadline = time.monotonic() + ECHO_TIMEOUT
+        while len(self.submitted) <= self._seen:
+            if time.monotonic() >= deadline or self.stop_event.is_set():
+                return False
+            time.sleep(0.02)
+        return self.submitted[-1] == [str(value) for value in values]
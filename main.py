@@ -1,620 +1,327 @@
-import csv
-import json
+import argparse
+import functools
 import logging
-import os
+import multiprocessing
+import sys
 import threading
 import time
-import tkinter as tk
-from dataclasses import dataclass
-from tkinter import filedialog, messagebox, ttk
 
-try:
-    import pyautogui
-except Exception:  # pragma: no cover - optional dependency
-    pyautogui = None
-
-APP_TITLE = "Importador de Vendas"
-CONFIG_FILE = "config.json"
-LOG_DIR = "logs"
-LOG_FILE = os.path.join(LOG_DIR, "app.log")
-REQUIRED_FIELDS = ["OBJETO", "PESO", "ALTURA", "LARGURA", "COMPRIMENTO"]
-FIELD_LABELS = {
-    "OBJETO": "Objeto",
-    "PESO": "Peso",
-    "ALTURA": "Altura",
-    "LARGURA": "Largura",
-    "COMPRIMENTO": "Comprimento",
-}
-
-
-@dataclass
-class AppConfig:
-    column_mapping: dict
-    skip_first_line: bool
-    speed_preset: str
-    auto_speed: bool
-
-
-def ensure_logging():
-    os.makedirs(LOG_DIR, exist_ok=True)
-    logging.basicConfig(
-        filename=LOG_FILE,
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
+from core import (
+    EMIT_MODES,
+    REQUIRED_FIELDS,
+    ControlEvent,
+    NullSink,
+    RecordingSink,
+    ShardCoordinator,
+    SubmittedIndex,
+    build_speed_settings,
+    compile_template,
+    ensure_logging,
+    field_templates,
+    format_job_results,
+    format_shard_status,
+    format_validation_report,
+    keyboard_keys,
+    load_config,
+    load_resume_point,
+    prepare_job,
+    run_job_queue,
+    run_shard_worker,
+    speed_presets,
+)
+
+PROGRESS_PRINT_SECONDS = 5.0
+WORKER_JOIN_SECONDS = 0.2
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Importador de Vendas. Sem arquivos, abre a janela.",
     )
-
-
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return AppConfig(
-            column_mapping={},
-            skip_first_line=True,
-            speed_preset="Normal",
-            auto_speed=False,
-        )
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        column_mapping = data.get("column_mapping", {})
-        if "SRO" in column_mapping and "OBJETO" not in column_mapping:
-            column_mapping["OBJETO"] = column_mapping.pop("SRO")
-        return AppConfig(
-            column_mapping=column_mapping,
-            skip_first_line=data.get("skip_first_line", True),
-            speed_preset=data.get("speed_preset", "Normal"),
-            auto_speed=bool(data.get("auto_speed", False)),
-        )
-    except Exception as exc:
-        logging.exception("Falha ao carregar config: %s", exc)
-        return AppConfig(
-            column_mapping={},
-            skip_first_line=True,
-            speed_preset="Normal",
-            auto_speed=False,
-        )
-
-
-def save_config(config: AppConfig):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as file:
-        json.dump(
-            {
-                "column_mapping": config.column_mapping,
-                "skip_first_line": config.skip_first_line,
-                "speed_preset": config.speed_preset,
-                "auto_speed": config.auto_speed,
-            },
-            file,
-            ensure_ascii=False,
-            indent=2,
-        )
-
-
-def detect_delimiter(sample_text):
-    try:
-        dialect = csv.Sniffer().sniff(sample_text, delimiters=";,\t,")
-        return dialect.delimiter
-    except csv.Error:
-        if ";" in sample_text:
-            return ";"
-        return ","
-
-
-def read_csv_rows(file_path, skip_first_line):
-    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
-        sample = file.read(4096)
-        file.seek(0)
-        delimiter = detect_delimiter(sample)
-        reader = csv.reader(file, delimiter=delimiter)
-        if skip_first_line:
-            next(reader, None)
-        for row in reader:
-            yield row
-
-
-def count_lines(file_path, skip_first_line):
-    return sum(1 for _ in read_csv_rows(file_path, skip_first_line))
-
-
-def detect_header(file_path):
-    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
-        sample = file.read(4096)
-        delimiter = detect_delimiter(sample)
-        try:
-            return csv.Sniffer().has_header(sample), delimiter
-        except csv.Error:
-            return False, delimiter
-
-
-def normalize_text(value):
-    return "".join(ch.lower() for ch in str(value).strip() if ch.isalnum())
-
-
-def validate_row(data):
-    errors = []
-    if not data.get("OBJETO"):
-        errors.append("Objeto vazio")
-    for field in ["PESO", "ALTURA", "LARGURA", "COMPRIMENTO"]:
-        value = data.get(field, "")
-        try:
-            if value == "":
-                raise ValueError("vazio")
-            float(str(value).replace(",", "."))
-        except Exception:
-            errors.append(f"{field} inválido")
-    return errors
-
-
-def type_with_enter(value, key_interval):
-    pyautogui.typewrite(str(value), interval=key_interval)
-    pyautogui.press("enter")
-
-
-def process_file(
-    file_path,
-    column_mapping,
-    skip_first_line,
-    on_progress,
-    should_pause,
-    should_stop,
-    speed_settings,
-):
-    total = count_lines(file_path, skip_first_line)
-    processed = 0
-    auto_multiplier = 1.0
-    logging.info("Iniciando automação para %s", file_path)
-
-    for row in read_csv_rows(file_path, skip_first_line):
-        if should_stop.is_set():
-            logging.info("Processamento interrompido pelo usuário")
-            break
-        while should_pause.is_set():
-            time.sleep(0.1)
-        data = {}
-        for field, index in column_mapping.items():
-            try:
-                data[field] = row[index]
-            except Exception:
-                data[field] = ""
-        errors = validate_row(data)
-        if errors:
-            logging.warning("Linha %s inválida: %s", processed + 1, "; ".join(errors))
-            if speed_settings["auto_speed"]:
-                auto_multiplier = min(auto_multiplier + 0.1, 3.0)
-            processed += 1
-            on_progress(processed, total)
-            continue
-        if pyautogui is None:
-            logging.error("pyautogui não instalado, não é possível digitar")
-            raise RuntimeError("pyautogui não instalado")
-        key_interval = speed_settings["key_interval"] * auto_multiplier
-        field_delay = speed_settings["field_delay"] * auto_multiplier
-        type_with_enter(data["OBJETO"], key_interval)
-        time.sleep(field_delay)
-        type_with_enter(data["PESO"], key_interval)
-        time.sleep(field_delay)
-        type_with_enter(data["ALTURA"], key_interval)
-        time.sleep(field_delay)
-        type_with_enter(data["LARGURA"], key_interval)
-        time.sleep(field_delay)
-        type_with_enter(data["COMPRIMENTO"], key_interval)
-        time.sleep(field_delay)
-        if speed_settings["auto_speed"] and auto_multiplier > 1.0:
-            auto_multiplier = max(auto_multiplier - 0.05, 1.0)
-        processed += 1
-        on_progress(processed, total)
-
-    logging.info("Processamento finalizado")
-
-
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        ensure_logging()
-        self.title(APP_TITLE)
-        self.geometry("420x650")
-        self.config = load_config()
-        self.file_path = ""
-        self.total_lines = 0
-        self.processing_thread = None
-        self.pause_event = threading.Event()
-        self.stop_event = threading.Event()
-        self.countdown_seconds = 5
-        self.countdown_remaining = 0
-        self.countdown_after_id = None
-        self.column_values = []
-        self.column_search_vars = {}
-        self.has_header = True
-        self.speed_preset_var = tk.StringVar(value=self.config.speed_preset)
-        self.auto_speed_var = tk.BooleanVar(value=self.config.auto_speed)
-        self._build_ui()
-        self.bind("<Escape>", lambda _event: self.stop_processing())
-
-    def _build_ui(self):
-        file_frame = ttk.LabelFrame(self, text="Arquivo CSV")
-        file_frame.pack(fill="x", padx=10, pady=10)
-
-        self.file_label = ttk.Label(file_frame, text="Nenhum arquivo selecionado")
-        self.file_label.pack(side="left", padx=10, pady=10)
-
-        ttk.Button(file_frame, text="Selecionar", command=self.select_file).pack(
-            side="right", padx=10, pady=10
-        )
-
-        status_frame = ttk.LabelFrame(self, text="Status")
-        status_frame.pack(fill="x", padx=10, pady=10)
-
-        self.total_label = ttk.Label(status_frame, text="Total de linhas: 0")
-        self.total_label.pack(anchor="w", padx=10)
-
-        self.status_label = ttk.Label(status_frame, text="Status: Aguardando")
-        self.status_label.pack(anchor="w", padx=10)
-
-        self.countdown_label = ttk.Label(status_frame, text="Início em: -")
-        self.countdown_label.pack(anchor="w", padx=10)
-
-        self.progress = ttk.Progressbar(status_frame, length=400, mode="determinate")
-        self.progress.pack(fill="x", padx=10, pady=10)
-
-        config_frame = ttk.LabelFrame(self, text="Configuração de Colunas")
-        config_frame.pack(fill="both", padx=10, pady=10, expand=True)
-
-        self.skip_var = tk.BooleanVar(value=self.config.skip_first_line)
-        ttk.Checkbutton(
-            config_frame,
-            text="Pular primeira linha",
-            variable=self.skip_var,
-            command=self.on_skip_toggle,
-        ).grid(row=0, column=0, sticky="w", padx=10, pady=5)
-
-        self.column_vars = {}
-        for idx, field in enumerate(REQUIRED_FIELDS, start=1):
-            ttk.Label(config_frame, text=FIELD_LABELS.get(field, field)).grid(
-                row=idx, column=0, sticky="w", padx=10, pady=5
-            )
-            search_var = tk.StringVar()
-            search_entry = ttk.Entry(config_frame, textvariable=search_var)
-            search_entry.grid(row=idx, column=1, sticky="ew", padx=10, pady=5)
-            search_entry.bind(
-                "<KeyRelease>",
-                lambda event, field=field: self.on_column_search(event, field),
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="arquivos .csv, .csv.gz, .zip ou .xlsx para processar sem janela",
+    )
+    parser.add_argument(
+        "--map",
+        action="append",
+        default=[],
+        metavar="CAMPO=COLUNA",
+        help="coluna de um campo (nome do cabeçalho ou número); padrão: config.json",
+    )
+    parser.add_argument(
+        "--preset", help="velocidade (Lenta, Normal, Rápida ou um perfil calibrado); padrão: config.json"
+    )
+    parser.add_argument("--emit", choices=EMIT_MODES, help="modo de envio; padrão: config.json")
+    parser.add_argument(
+        "--template", help="modelo de formulário (sequência de campos); padrão: config.json"
+    )
+    parser.add_argument("--record-delay", type=float, help="pausa por registro em segundos")
+    parser.add_argument(
+        "--skip-first-line",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="pula a primeira linha; padrão: config.json",
+    )
+    parser.add_argument(
+        "--skip-submitted",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="ignora objetos já enviados; padrão: config.json",
+    )
+    parser.add_argument("--from-row", type=int, default=1, help="primeira linha de dados (1 = início)")
+    parser.add_argument("--to-row", type=int, help="última linha de dados (inclusive)")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="continua digitando as linhas novas do último arquivo até Ctrl+C",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="processa sem digitar nada")
+    parser.add_argument("--record", metavar="ARQUIVO", help="com --dry-run, grava as teclas em um arquivo")
+    parser.add_argument("--validate", action="store_true", help="apenas valida os arquivos")
+    parser.add_argument("--resume", action="store_true", help="retoma o primeiro arquivo do diário")
+    parser.add_argument(
+        "--shared-dir",
+        metavar="PASTA",
+        help="pasta compartilhada para dividir um arquivo em lotes entre vários computadores",
+    )
+    parser.add_argument("--shards", type=int, default=4, help="quantidade de lotes (com --shared-dir)")
+    parser.add_argument("--worker", help="nome deste computador nos lotes; padrão: host-pid")
+    parser.add_argument(
+        "--shard-status", action="store_true", help="mostra o andamento dos lotes e sai"
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=5.0,
+        help="segundos de espera antes de digitar (para focar a janela de destino)",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_mapping(items, column_mapping):
+    mapping = dict(column_mapping)
+    for item in items:
+        field, separator, column = item.partition("=")
+        field = field.strip().upper()
+        if not separator or field not in REQUIRED_FIELDS:
+            raise ValueError(f"Mapeamento inválido: {item}")
+        mapping[field] = column.strip()
+    return mapping
+
+
+def make_progress_printer():
+    last_print = [0.0]
+
+    def on_progress(processed, total, invalid, skipped, unconfirmed):
+        now = time.monotonic()
+        if now - last_print[0] >= PROGRESS_PRINT_SECONDS or processed == total:
+            last_print[0] = now
+            print(
+                f"{processed}/{total} linhas ({invalid} inválidas, {skipped} já enviadas,"
+                f" {unconfirmed} não confirmadas)",
+                file=sys.stderr,
             )
 
-            var = tk.StringVar()
-            combo = ttk.Combobox(config_frame, textvariable=var, state="readonly")
-            combo.grid(row=idx, column=2, sticky="ew", padx=10, pady=5)
-            combo.bind("<<ComboboxSelected>>", lambda _event: self.save_config())
-
-            self.column_search_vars[field] = (search_var, search_entry)
-            self.column_vars[field] = (var, combo)
-
-        config_frame.columnconfigure(1, weight=1)
-        config_frame.columnconfigure(2, weight=1)
-
-        ttk.Button(config_frame, text="Salvar configurações", command=self.save_config).grid(
-            row=len(REQUIRED_FIELDS) + 1,
-            column=0,
-            columnspan=3,
-            sticky="ew",
-            padx=10,
-            pady=10,
-        )
+    return on_progress
 
-        speed_frame = ttk.LabelFrame(self, text="Velocidade da automação")
-        speed_frame.pack(fill="x", padx=10, pady=10)
 
-        ttk.Label(speed_frame, text="Preset").grid(row=0, column=0, sticky="w", padx=10, pady=5)
-        speed_combo = ttk.Combobox(
-            speed_frame,
-            textvariable=self.speed_preset_var,
-            values=["Lenta", "Normal", "Rápida"],
-            state="readonly",
-        )
-        speed_combo.grid(row=0, column=1, sticky="ew", padx=10, pady=5)
-        speed_combo.bind("<<ComboboxSelected>>", lambda _event: self.save_config())
-
-        ttk.Checkbutton(
-            speed_frame,
-            text="Modo automático (ajusta se errar)",
-            variable=self.auto_speed_var,
-            command=self.save_config,
-        ).grid(row=1, column=0, columnspan=2, sticky="w", padx=10, pady=5)
-
-        speed_frame.columnconfigure(1, weight=1)
-
-        control_frame = ttk.Frame(self)
-        control_frame.pack(fill="x", padx=10, pady=10)
-
-        self.start_button = ttk.Button(control_frame, text="Iniciar", command=self.start_processing)
-        self.start_button.pack(side="left", padx=5)
-
-        self.pause_button = ttk.Button(control_frame, text="Pausar", command=self.toggle_pause)
-        self.pause_button.pack(side="left", padx=5)
-
-        self.stop_button = ttk.Button(control_frame, text="Parar", command=self.stop_processing)
-        self.stop_button.pack(side="left", padx=5)
-
-    def select_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
-        if not file_path:
-            return
-        self.file_path = file_path
-        self.file_label.config(text=os.path.basename(file_path))
-        self.update_columns()
-        self.update_total_lines()
-        self.status_label.config(text="Status: Aguardando")
-
-    def update_columns(self):
-        columns = []
-        if self.file_path:
-            has_header, delimiter = detect_header(self.file_path)
-            self.has_header = has_header
-            with open(self.file_path, "r", encoding="utf-8-sig", newline="") as file:
-                reader = csv.reader(file, delimiter=delimiter)
-                first_row = next(reader, [])
-                if has_header:
-                    columns = [col.strip() for col in first_row] or []
-        if not columns:
-            columns = [str(i) for i in range(1, 51)]
-            self.has_header = False
-        self.column_values = columns
-
-        for field, (var, combo) in self.column_vars.items():
-            combo["values"] = [""] + columns
-            saved = self.config.column_mapping.get(field)
-            if saved in columns:
-                var.set(saved)
-            elif self.has_header:
-                normalized_field = normalize_text(field)
-                best = next(
-                    (col for col in columns if normalize_text(col) == normalized_field),
-                    None,
-                )
-                if best is None:
-                    best = next(
-                        (col for col in columns if normalized_field in normalize_text(col)),
-                        None,
-                    )
-                if best is not None:
-                    var.set(best)
-                else:
-                    var.set("")
-            elif columns:
-                var.set("")
-
-        self.save_config()
-
-    def on_column_search(self, event, field):
-        value = event.widget.get()
-        if value == "":
-            filtered = self.column_values
-        else:
-            value_lower = value.lower()
-            filtered = [
-                column
-                for column in self.column_values
-                if value_lower in str(column).lower()
-            ]
-        _search_var, _search_entry = self.column_search_vars.get(field, (None, None))
-        _var, combo = self.column_vars.get(field, (None, None))
-        if combo is not None:
-            combo["values"] = [""] + filtered
-        self.save_config()
+def run_until_interrupted(target, stop_event):
+    outcome = {}
+    done = threading.Event()
 
-    def update_total_lines(self):
-        if not self.file_path:
-            self.total_lines = 0
-            self.total_label.config(text="Total de linhas: 0")
-            return
+    def work():
         try:
-            self.total_lines = count_lines(self.file_path, self.skip_var.get())
-            self.total_label.config(text=f"Total de linhas: {self.total_lines}")
-        except Exception as exc:
-            logging.exception("Erro ao contar linhas: %s", exc)
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo CSV.")
-
-    def save_config(self):
-        mapping = {}
-        for field, (var, _combo) in self.column_vars.items():
-            if var.get():
-                mapping[field] = var.get()
-        self.config = AppConfig(
-            column_mapping=mapping,
-            skip_first_line=self.skip_var.get(),
-            speed_preset=self.speed_preset_var.get(),
-            auto_speed=self.auto_speed_var.get(),
-        )
-        save_config(self.config)
-
-    def on_skip_toggle(self):
-        self.save_config()
-        self.update_total_lines()
-
-    def resolve_mapping(self):
-        if not self.file_path:
-            return {}
-        has_header, delimiter = detect_header(self.file_path)
-        header = []
-        if has_header:
-            with open(self.file_path, "r", encoding="utf-8-sig", newline="") as file:
-                reader = csv.reader(file, delimiter=delimiter)
-                header = next(reader, [])
-        mapping = {}
-        for field, value in self.config.column_mapping.items():
-            if value in header:
-                mapping[field] = header.index(value)
-            else:
-                try:
-                    mapping[field] = int(value) - 1
-                except Exception:
-                    mapping[field] = 0
-        return mapping
-
-    def start_processing(self):
-        if not self.file_path:
-            messagebox.showwarning("Aviso", "Selecione um arquivo CSV primeiro.")
-            return
-        if self.processing_thread and self.processing_thread.is_alive():
-            messagebox.showinfo("Info", "Processamento já está em andamento.")
-            return
-        if pyautogui is None:
-            messagebox.showerror(
-                "Erro",
-                "pyautogui não está instalado. Instale para habilitar a automação.",
-            )
-            return
-        self.stop_event.clear()
-        self.pause_event.clear()
-        self.progress["value"] = 0
-        mapping = self.resolve_mapping()
-        if not mapping or any(field not in mapping for field in REQUIRED_FIELDS):
-            messagebox.showwarning("Aviso", "Configure todas as colunas antes de iniciar.")
-            return
-        self.set_controls_state("countdown")
-        if self.countdown_after_id is not None:
-            self.after_cancel(self.countdown_after_id)
-            self.countdown_after_id = None
-        self.countdown_remaining = self.countdown_seconds
-        self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
-        self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
-        self.update_idletasks()
-        self._update_countdown(mapping)
-
-    def _update_countdown(self, mapping):
-        if self.stop_event.is_set():
-            self._reset_countdown_ui(status="Status: Parado")
-            self.set_controls_state("idle")
-            return
-        if self.pause_event.is_set():
-            self.status_label.config(text="Status: Pausado (contagem)")
-            self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
-            self.countdown_after_id = self.after(200, lambda: self._update_countdown(mapping))
-            return
-        if self.countdown_remaining <= 0:
-            self.status_label.config(text="Status: Processando")
-            self.countdown_label.config(text="Início em: 0s")
-            self.processing_thread = threading.Thread(
-                target=self._run_processing,
-                args=(mapping,),
-                daemon=True,
-            )
-            self.processing_thread.start()
-            self.set_controls_state("processing")
-            return
-        self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
-        self.countdown_label.config(text=f"Início em: {self.countdown_remaining}s")
-        self.countdown_remaining -= 1
-        self.countdown_after_id = self.after(1000, lambda: self._update_countdown(mapping))
-
-    def _run_processing(self, mapping):
+            outcome["results"] = target()
+        except BaseException as exc:
+            outcome["error"] = exc
+        finally:
+            done.set()
+
+    threading.Thread(target=work, daemon=True).start()
+    interrupted = False
+    while not done.is_set():
+        try:
+            done.wait(WORKER_JOIN_SECONDS)
+        except KeyboardInterrupt:
+            if not interrupted:
+                logging.info("Processamento interrompido pelo usuário (Ctrl+C)")
+                print("Parando...", file=sys.stderr)
+            interrupted = True
+            stop_event.set()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["results"], interrupted
+
+
+def run_validation(args, column_mapping, skip_first_line, profiles):
+    exit_code = 0
+    for file_path in args.files:
         try:
-            process_file(
-                self.file_path,
-                mapping,
-                self.skip_var.get(),
-                self.update_progress,
-                self.pause_event,
-                self.stop_event,
-                self.get_speed_settings(),
+            _mapping, report = prepare_job(
+                file_path, column_mapping, skip_first_line, profiles
             )
-            self.after(0, lambda: self.status_label.config(text="Status: Finalizado"))
-            self.after(0, lambda: self._reset_countdown_ui())
-            self.after(0, lambda: self.set_controls_state("idle"))
-        except Exception as exc:
-            logging.exception("Erro durante processamento: %s", exc)
-            self.after(0, lambda: messagebox.showerror("Erro", str(exc)))
-            self.after(0, lambda: self.status_label.config(text="Status: Erro"))
-            self.after(0, lambda: self._reset_countdown_ui())
-            self.after(0, lambda: self.set_controls_state("idle"))
-
-    def update_progress(self, processed, total):
-        self.after(
-            0,
-            lambda: self._update_progress_ui(processed, total),
-        )
-
-    def _update_progress_ui(self, processed, total):
-        self.progress["maximum"] = max(total, 1)
-        self.progress["value"] = processed
-        self.total_label.config(text=f"Total de linhas: {total}")
-
-    def toggle_pause(self):
-        in_countdown = self.countdown_remaining > 0 and (
-            self.processing_thread is None or not self.processing_thread.is_alive()
-        )
-        in_processing = self.processing_thread is not None and self.processing_thread.is_alive()
+        except (OSError, ValueError) as exc:
+            print(f"{file_path}: {exc}", file=sys.stderr)
+            exit_code = 2
+            continue
+        print(f"{file_path}:")
+        print(format_validation_report(report))
+        if report.invalid:
+            exit_code = 1
+    return exit_code
 
-        if not (in_countdown or in_processing):
-            return
 
-        if self.pause_event.is_set():
-            self.pause_event.clear()
-            self.pause_button.config(text="Pausar")
-            if in_countdown:
-                self.status_label.config(text=f"Status: Iniciando em {self.countdown_remaining}...")
-            else:
-                self.status_label.config(text="Status: Processando")
+def run_cli(args):
+    ensure_logging()
+    config = load_config()
+    try:
+        column_mapping = parse_mapping(args.map, config.column_mapping)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    profiles = None if args.map else config.profiles
+    skip_first_line = config.skip_first_line
+    if args.skip_first_line is not None:
+        skip_first_line = args.skip_first_line
+    if args.validate:
+        return run_validation(args, column_mapping, skip_first_line, profiles)
+    if args.from_row < 1:
+        print("--from-row deve ser 1 ou mais.", file=sys.stderr)
+        return 2
+    if args.to_row is not None and args.to_row < args.from_row:
+        print("--to-row deve ser maior ou igual a --from-row.", file=sys.stderr)
+        return 2
+    if args.shared_dir and args.follow:
+        print("O modo contínuo não pode ser usado com lotes.", file=sys.stderr)
+        return 2
+    if args.shared_dir and len(args.files) != 1:
+        print("O modo em lotes processa um arquivo por vez.", file=sys.stderr)
+        return 2
+    if args.shard_status:
+        if not args.shared_dir:
+            print("--shard-status exige --shared-dir.", file=sys.stderr)
+            return 2
+        coordinator = ShardCoordinator(args.shared_dir, args.files[0], skip_first_line, args.shards)
+        print(format_shard_status(coordinator))
+        return 0
+
+    preset_name = args.preset or config.speed_preset
+    if preset_name not in speed_presets(config.speed_profiles):
+        print(f"Velocidade desconhecida: {preset_name}", file=sys.stderr)
+        return 2
+    template_name = args.template or config.template
+    templates = field_templates(config.templates)
+    if template_name not in templates:
+        print(f"Modelo desconhecido: {template_name}", file=sys.stderr)
+        return 2
+    try:
+        compile_template(templates[template_name], keyboard_keys())
+    except ValueError as exc:
+        print(f"Modelo {template_name}: {exc}", file=sys.stderr)
+        return 2
+    speed_settings = build_speed_settings(
+        preset_name,
+        args.emit or config.emit_mode,
+        config.record_delay if args.record_delay is None else args.record_delay,
+        speed_profiles=config.speed_profiles,
+        template_name=template_name,
+        templates=config.templates,
+    )
+    resume = None
+    if args.resume:
+        resume = load_resume_point(args.files[0])
+        if resume is None:
+            print(f"Nada para retomar em {args.files[0]}", file=sys.stderr)
+            return 2
+
+    record_file = None
+    sink_factory = None
+    if args.dry_run:
+        if args.record:
+            record_file = open(args.record, "w", encoding="utf-8")
+            sink_factory = lambda: RecordingSink(record_file)  # noqa: E731
         else:
-            self.pause_event.set()
-            self.pause_button.config(text="Continuar")
-            if in_countdown:
-                self.status_label.config(text="Status: Pausado (contagem)")
-            else:
-                self.status_label.config(text="Status: Pausado")
-
-    def stop_processing(self):
-        if self.countdown_remaining > 0:
-            self.stop_event.set()
-            if self.countdown_after_id is not None:
-                self.after_cancel(self.countdown_after_id)
-                self.countdown_after_id = None
-            self._reset_countdown_ui(status="Status: Parado")
-            self.set_controls_state("idle")
-            return
-        if not self.processing_thread or not self.processing_thread.is_alive():
-            return
-        self.stop_event.set()
-        self.pause_event.clear()
-        self.pause_button.config(text="Pausar")
-        self.status_label.config(text="Status: Parando")
-
-    def _reset_countdown_ui(self, status=None):
-        self.countdown_remaining = 0
-        self.countdown_label.config(text="Início em: -")
-        if status is not None:
-            self.status_label.config(text=status)
+            sink_factory = NullSink
+    skip_submitted = config.skip_submitted if args.skip_submitted is None else args.skip_submitted
+    submitted = SubmittedIndex() if skip_submitted and not args.dry_run else None
 
-    def get_speed_settings(self):
-        preset = self.speed_preset_var.get()
-        if preset == "Lenta":
-            base_key = 0.08
-            base_delay = 0.4
-        elif preset == "Rápida":
-            base_key = 0.01
-            base_delay = 0.1
+    condition = threading.Condition()
+    pause_event = ControlEvent(condition)
+    stop_event = ControlEvent(condition)
+    try:
+        if not args.dry_run and args.delay > 0:
+            print(f"Iniciando em {args.delay:g}s...", file=sys.stderr)
+            time.sleep(args.delay)
+        if args.shared_dir:
+            target = functools.partial(
+                run_shard_worker,
+                args.shared_dir,
+                args.files[0],
+                args.shards,
+                column_mapping,
+                skip_first_line,
+                make_progress_printer(),
+                pause_event,
+                stop_event,
+                speed_settings,
+                worker=args.worker,
+                submitted=submitted,
+                sink_factory=sink_factory,
+                profiles=profiles,
+            )
         else:
-            base_key = 0.04
-            base_delay = 0.25
-        return {
-            "key_interval": base_key,
-            "field_delay": base_delay,
-            "auto_speed": self.auto_speed_var.get(),
-        }
-
-    def set_controls_state(self, state):
-        if state == "idle":
-            self.start_button.config(state="normal")
-            self.pause_button.config(state="disabled", text="Pausar")
-            self.stop_button.config(state="disabled")
-        elif state == "countdown":
-            self.start_button.config(state="disabled")
-            self.pause_button.config(state="normal")
-            self.stop_button.config(state="normal")
-        elif state == "processing":
-            self.start_button.config(state="disabled")
-            self.pause_button.config(state="normal")
-            self.stop_button.config(state="normal")
+            target = functools.partial(
+                run_job_queue,
+                args.files,
+                column_mapping,
+                skip_first_line,
+                make_progress_printer(),
+                pause_event,
+                stop_event,
+                speed_settings,
+                resume=resume,
+                use_journal=not args.dry_run,
+                submitted=submitted,
+                start_row=max(args.from_row - 1, 0),
+                end_row=args.to_row,
+                sink_factory=sink_factory,
+                profiles=profiles,
+                follow=args.follow,
+            )
+        results, interrupted = run_until_interrupted(target, stop_event)
+    except KeyboardInterrupt:
+        logging.info("Processamento interrompido pelo usuário (Ctrl+C)")
+        print("Interrompido.", file=sys.stderr)
+        return 130
+    except Exception as exc:
+        logging.exception("Erro durante processamento: %s", exc)
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if submitted is not None:
+            submitted.close()
+        if record_file is not None:
+            record_file.close()
+    print(format_job_results(results))
+    if interrupted:
+        print("Interrompido.", file=sys.stderr)
+        return 130
+    return 0 if all(result.status == "concluído" for result in results) else 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.files:
+        from gui import App
+
+        app = App()
+        app.mainloop()
+        return 0
+    return run_cli(args)
 
 
 if __name__ == "__main__":
-    app = App()
-    app.mainloop()
+    multiprocessing.freeze_support()
+    sys.exit(main())